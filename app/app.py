@@ -1,4 +1,5 @@
-﻿import os
+﻿import io
+import os
 import sys
 import pathlib
 import subprocess
@@ -35,21 +36,30 @@ ensure_session_defaults()
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+# Parsed-once, mtime-validated config (equations/formats/settings)
+from config_store import STORE as CONFIG_STORE
+
 # --- Define key directories ---
 ARTICLES_DIR = ROOT / "articles"
 OUTPUT_DIR = ROOT / "output"
 CONFIG_DIR = ROOT / "config"
 
+from article_index import ArticleIndex
+from asset_store import AssetStore
+
+@st.cache_resource(show_spinner=False)
+def article_index() -> ArticleIndex:
+    """Draft metadata index shared across reruns; a watchdog observer keeps it current."""
+    idx = ArticleIndex(ARTICLES_DIR)
+    idx.sync()
+    idx.watch()
+    return idx
+
 def get_draft_options() -> list[str]:
-    files = ["(new)"]
-    if (ROOT / "articles").exists():
-        for p in sorted((ROOT / "articles").glob("*.yaml")):
-            files.append(p.name)
-    return files
+    return ["(new)"] + article_index().names()
 
 def get_equation_options() -> list[tuple[str, str]]:
-    cfg = yaml.safe_load((ROOT / "config" / "equations.yaml").read_text(encoding="utf-8")) or {}
-    eqs = cfg.get("equations", []) or []
+    eqs = CONFIG_STORE.equation_list(ROOT / "config" / "equations.yaml")
     # (id, display-name)
     return [(e["id"], e.get("name", e["id"])) for e in eqs]
 
@@ -78,14 +88,11 @@ def bind_equation_selectbox(label: str, key_prefix: str, help: str | None = None
 
 def get_draft_filenames() -> list[str]:
     """Return list of YAML drafts in the /articles directory."""
-    files = ["(new)"]
-    if ARTICLES_DIR.exists():
-        for p in sorted(ARTICLES_DIR.glob("*.yaml")):
-            files.append(p.name)
-    return files
+    return ["(new)"] + article_index().names()
 
 # --- Import LLM client ---
-from llm_client import LLMClient
+from llm_client import get_client, SECTION_KEYS, SECTION_DEFAULTS, section_fields, sections_fingerprint
+from ripple_score import SIGNALS, extract_signals, score_article
 
 # Define key directories
 ARTICLES_DIR = ROOT / "articles"
@@ -108,11 +115,7 @@ def get_draft_filenames():
     Return a list of YAML draft filenames in the /articles directory.
     Always includes '(new)' as the first option.
     """
-    drafts = ["(new)"]
-    if ARTICLES_DIR.exists():
-        for path in sorted(ARTICLES_DIR.glob("*.yaml")):
-            drafts.append(path.name)
-    return drafts
+    return ["(new)"] + article_index().names()
 
 # Define brand assets
 BRAND_DIR = ROOT / "app" / "static" / "branding"
@@ -161,10 +164,7 @@ render_header()
 
 # ---------- helpers ----------
 def list_yaml_files() -> List[pathlib.Path]:
-    files: List[pathlib.Path] = []
-    files.extend(ARTICLES_DIR.glob("*.yml"))
-    files.extend(ARTICLES_DIR.glob("*.yaml"))
-    return sorted(files)
+    return [ARTICLES_DIR / n for n in article_index().names()]
 
 def load_yaml(p: pathlib.Path) -> Dict[str, Any]:
     try:
@@ -175,41 +175,21 @@ def load_yaml(p: pathlib.Path) -> Dict[str, Any]:
 
 def save_yaml(p: pathlib.Path, data: Dict[str, Any]) -> None:
     p.write_text(yaml.safe_dump(data, sort_keys=False, allow_unicode=True), encoding="utf-8")
+    article_index().update(p, data)
 
 # ---------- equation loading helper ----------
 
 def load_equations_yaml(p: pathlib.Path) -> Dict[str, Any]:
     """
-    Load equations YAML and ALWAYS return {"equations": {...}}.
-    Accepts:
-      - {"equations": {NAME: {weights: {...}}}}
-      - {NAME: {weights: {...}}}
-      - [{"name": NAME, "weights": {...}}, ...]
+    Load equations YAML and ALWAYS return {"equations": {...}}, normalized by
+    config_store.normalize_equations_obj (dict, {"equations": dict|list} or list shapes).
+    Served from CONFIG_STORE: parsed once, re-read only when the file changes.
     """
     try:
-        raw = yaml.safe_load(p.read_text(encoding="utf-8"))
+        return {"equations": CONFIG_STORE.equations(p)}
     except Exception:
         return {"equations": {}}
 
-    # Already in canonical shape
-    if isinstance(raw, dict) and "equations" in raw and isinstance(raw["equations"], dict):
-        return {"equations": raw["equations"]}
-
-    # Dict of equations w/out the top-level "equations" key
-    if isinstance(raw, dict):
-        return {"equations": raw}
-
-    # List form → coerce into named dict
-    if isinstance(raw, list):
-        eqs: Dict[str, Any] = {}
-        for i, item in enumerate(raw):
-            if isinstance(item, dict):
-                name = item.get("name") or f"eq_{i+1}"
-                eqs[name] = item
-        return {"equations": eqs}
-
-    return {"equations": {}}
-
 
 from typing import List, Dict, Any
 from pathlib import Path
@@ -220,14 +200,10 @@ ARTICLES_DIR = ROOT / "articles"
 CONFIG_DIR   = ROOT / "config"
 
 def list_yaml_files() -> List[Path]:
-    ARTICLES_DIR.mkdir(exist_ok=True)
-    return sorted(ARTICLES_DIR.glob("*.yaml"))
+    return [ARTICLES_DIR / n for n in article_index().names()]
 
 def load_equations() -> List[Dict[str, Any]]:
-    eq_path = CONFIG_DIR / "equations.yaml"
-    with open(eq_path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f) or {}
-    return data.get("equations", [])
+    return list(CONFIG_STORE.equation_list(CONFIG_DIR / "equations.yaml"))
 
 #####def bind_draft_selectbox(label: str, key_prefix: str) -> None:
 ###    files   = list_yaml_files()
@@ -276,40 +252,6 @@ def preview_yaml_box(data: Dict[str, Any], filename: str = "draft.yaml") -> None
     )
 
 
-# --- Equations helpers -------------------------------------------------
-
-def normalize_equations_obj(eq_all: Any) -> Dict[str, Dict[str, Any]]:
-    """
-    Accepts multiple YAML shapes and returns a dict:
-    { "EquationName": {"weights": {...}}, ... }
-    """
-    # Case A1: {"equations": {...}}   (already a dict)
-    if isinstance(eq_all, dict) and isinstance(eq_all.get("equations"), dict):
-        return eq_all["equations"]
-
-    # Case A2: {"equations": [...]}   (list; normalize it)
-    if isinstance(eq_all, dict) and isinstance(eq_all.get("equations"), list):
-        return normalize_equations_obj(eq_all["equations"])
-
-    # Case B: already a dict of equations
-    if isinstance(eq_all, dict):
-        return eq_all
-
-    # Case C: list forms → coerce to dict
-    out: Dict[str, Dict[str, Any]] = {}
-    if isinstance(eq_all, list):
-        for item in eq_all:
-            # [{id/name, weights}, ...]
-            if isinstance(item, dict) and ("id" in item or "name" in item):
-                key = str(item.get("id") or item.get("name"))
-                out[key] = {"weights": item.get("weights", {})}
-            # [{"EqName": {...}}]  OR [{"EqName": {"weights": {...}}}]
-            elif isinstance(item, dict):
-                for k, v in item.items():
-                    if isinstance(v, dict):
-                        out[str(k)] = v
-    return out
-
 # --- Intention meta guard (in-memory) ----------------------------------------
 def ensure_meta_signals(
     data: Dict[str, Any],
@@ -336,31 +278,16 @@ def ensure_meta_signals(
         or "none"
     )
 
-    # Load equations via canonical loader (always returns {"equations": {...}} when possible)
-    eq_raw = load_equations_yaml(eq_path)
-    eq_dict: Dict[str, Dict[str, Any]] = {}
-
-    if isinstance(eq_raw, dict):
-        # Preferred canonical shape
-        if isinstance(eq_raw.get("equations"), dict):
-            eq_dict = eq_raw["equations"]
-        else:
-            # Be permissive: if it's already a mapping of equations, accept it
-            if all(isinstance(v, dict) for v in eq_raw.values()):
-                eq_dict = eq_raw
-
-    # Compute normalized signals from current data
-    signals: Dict[str, float] = extract_signals(data)
+    # Normalized, frozen {id: {"weights": {...}}} from the config store
+    eq_dict = load_equations_yaml(eq_path)["equations"]
 
     # Choose weights (from chosen equation if present; fallback = equal weights)
-    weights: Dict[str, float] = {}
-    if isinstance(eq_dict, dict) and eq_name in eq_dict and isinstance(eq_dict[eq_name], dict):
-        weights = (eq_dict[eq_name].get("weights") or {}) if isinstance(eq_dict[eq_name].get("weights"), dict) else {}
-    if not weights:
-        weights = {k: 1.0 for k in signals.keys()}
+    weights: Dict[str, float] = dict((eq_dict.get(eq_name) or {}).get("weights") or {})
+    if not any(weights.values()):
+        weights = {k: 1.0 for k in SIGNALS}
 
-    # Compute score
-    score = apply_equation(signals, weights)
+    # Compute signals + score (memoized: unchanged text + weights return instantly)
+    signals, score, key = score_article(data, weights)
 
     # Persist into the in-memory article dict
     meta = data.setdefault("meta", {})
@@ -368,16 +295,24 @@ def ensure_meta_signals(
     meta["ripple_score"] = float(score)
     meta["equation"] = str(eq_name)
     meta["weights"] = {k: float(v) for k, v in weights.items()}
+    meta["score_key"] = key
 
     return data
 
-def render_selected(paths: List[str], env_vars: Dict[str, str]) -> subprocess.CompletedProcess:
-    # render.py already accepts file globs; we pass paths (or nothing to render all)
-    cmd = [sys.executable, str(ROOT / "render.py")]
-    cmd.extend(paths)
-    env = os.environ.copy()
-    env.update(env_vars or {})
-    return subprocess.run(cmd, cwd=str(ROOT), env=env, capture_output=True, text=True)
+def studio_llm(mock_mode: bool, openai_key: str | None):
+    """Shared LLM client (and HTTP connection pool) for every Studio action."""
+    return get_client(use_mock=True if mock_mode else None, api_key=openai_key or None)
+
+@st.cache_resource(show_spinner=False)
+def get_site_builder(mock_mode: bool, openai_key: str | None):
+    """One long-lived render.SiteBuilder (Jinja env + LLM client) per mock/key combination;
+    it re-reads settings.yaml at the start of every build."""
+    from render import SiteBuilder
+    return SiteBuilder(root=ROOT, llm=studio_llm(mock_mode, openai_key))
+
+def render_selected(paths: List[str], mock_mode: bool, openai_key: str | None):
+    # Render in-process; paths are file globs (or nothing to render all). Returns render.BuildResult.
+    return get_site_builder(mock_mode, openai_key).build(paths or None)
 
 
 # --- Output helpers ---------------------------------------------------------
@@ -401,39 +336,26 @@ def find_post_outputs(slug: str) -> tuple[pathlib.Path | None, pathlib.Path | No
 def write_render_refresh(choice: str | None,
                          data: Dict[str, Any],
                          openai_key: str | None,
-                         mock_mode: bool) -> subprocess.CompletedProcess:
+                         mock_mode: bool):
     """
     1) Generate sections with LLM based on current YAML (incl. intention_equation if present)
     2) Save YAML
     3) Render selected draft (or all if none)
-    4) Return the render process so caller can show logs
+    4) Return the render.BuildResult so caller can show logs
     """
-    llm = LLMClient()
-    if mock_mode:
-        os.environ["RIPPLEWRITER_MOCK"] = "1"
-    elif openai_key:
-        os.environ["OPENAI_API_KEY"] = openai_key
-
-    to_send = default_article()
-    for k in ("title", "thesis", "audience", "tone", "outline", "claims",
-              "intention_equation", "format"):
-        if k in data:
-            to_send[k] = data[k]
+    llm = studio_llm(mock_mode, openai_key)
+
+    to_send = section_fields({**default_article(), **data})
 
     sections = llm.write_post_sections(to_send)
     data["generated_sections"] = sections
+    data["generated_sections_hash"] = sections_fingerprint(to_send)  # lets render.py reuse them
 
     if choice and choice != "(new)":
         save_yaml(ARTICLES_DIR / choice, data)
 
-    env_vars = {}
-    if openai_key:
-        env_vars["OPENAI_API_KEY"] = openai_key
-    if mock_mode:
-        env_vars["RIPPLEWRITER_MOCK"] = "1"
-
     paths_arg = [str(ARTICLES_DIR / choice)] if (choice and choice != "(new)") else []
-    return render_selected(paths_arg, env_vars)
+    return render_selected(paths_arg, mock_mode, openai_key)
 
 # -------- Inline Preview helpers --------------------------------------------
 OUTPUT_DIR = (ROOT / "output").resolve()
@@ -515,83 +437,7 @@ def expected_output_html(choice: str | None, data: Dict[str, Any]):
     # Fallback to site index so the preview still shows *something*
     return OUTPUT_DIR / "index.html"
 
-# ---------- Ripple score: load equations, extract signals, score ----------
-
-def _safe_len(x) -> int:
-    try:
-        return len(x)
-    except Exception:
-        return 0
-
-def extract_sections(article: Dict[str, Any]) -> Dict[str, str]:
-    """Return a dict of key text buckets to analyze."""
-    txt = []
-    # Use generated sections if present; fallback to outline + thesis
-    gen = article.get("generated_sections", {})
-    for k in ("lede", "body", "counterpoints", "conclusion"):
-        v = gen.get(k, "")
-        if isinstance(v, list):  # some LLMs may return arrays
-            v = "\n".join(v)
-        txt.append(v or "")
-    thesis = article.get("thesis", "")
-    outline = "\n".join(article.get("outline", []))
-    return {
-        "thesis": thesis or "",
-        "outline": outline or "",
-        "content": "\n\n".join(txt).strip(),
-    }
-
-def _count_bullets(s: str) -> int:
-    # quick proxy for structure/clarity: leading hyphens/numbers
-    return sum(1 for line in s.splitlines() if line.strip().startswith(("-", "*", "•", "1.", "2.", "3.")))
-
-def _count_citations(s: str) -> int:
-    # quick proxy for evidence: markdown/linky bits
-    hints = ["http://", "https://", "[", "](", "doi:", "arxiv.org", "source", "citation", "references"]
-    return sum(s.lower().count(h) for h in hints)
-
-def _count_unique_terms(s: str) -> int:
-    import re
-    toks = [t.lower() for t in re.findall(r"[a-zA-Z]{4,}", s)]
-    return len(set(toks))
-
-def extract_signals(article: Dict[str, Any]) -> Dict[str, float]:
-    """
-    Very light heuristics to get us started.
-    Replace with your proper analyzers later (LLM checks, classifiers, etc.).
-    """
-    sec = extract_sections(article)
-    content = sec["content"]
-    thesis = sec["thesis"]
-    outline = sec["outline"]
-
-    words = _safe_len(content.split())
-    coherence = min(1.0, (words / 800.0))  # longer → more developed (proxy)
-    evidence  = min(1.0, (_count_citations(content) / 6.0))
-    clarity   = min(1.0, (_count_bullets(outline) / 8.0))
-    novelty   = min(1.0, (_count_unique_terms(content) / 800.0))
-    # sentiment proxy: neutral-ish = good; we’ll keep 0.7 baseline for now
-    sentiment = 0.7
-
-    return {
-        "coherence": coherence,
-        "evidence": evidence,
-        "novelty": novelty,
-        "clarity": clarity,
-        "sentiment": sentiment,
-    }
-
-def apply_equation(signals: Dict[str, float], weights: Dict[str, float]) -> float:
-    # weighted sum over shared keys, then clamp to [0, 1]
-    num = 0.0
-    den = 0.0
-    for k, w in weights.items():
-        v = float(signals.get(k, 0.0))
-        num += w * v
-        den += abs(w)
-    if den == 0:
-        return 0.0
-    return max(0.0, min(1.0, num / den))
+# ---------- Ripple score: signals & equations live in ripple_score.py ----------
 
 def _guess_slug_from_yaml(article: Dict[str, Any]) -> str:
     slug = (article.get("slug") or article.get("title", "")).strip()
@@ -625,14 +471,9 @@ def default_article() -> Dict[str, Any]:
         "date": str(date.today()),
         "slug": "untitled",
         "thesis": "One-line thesis of the op-ed.",
-        "audience": "general readers",
-        "tone": "plain-spoken",
-        "outline": [
-            "Lede: hook, why now",
-            "Body: main points",
-            "Counterpoints & limits",
-            "Conclusion"
-        ],
+        "audience": SECTION_DEFAULTS["audience"],
+        "tone": SECTION_DEFAULTS["tone"],
+        "outline": list(SECTION_DEFAULTS["outline"]),
         "claims": [],
         "images": [],
         "publish": {"draft": False, "category": "oped", "tags": ["ripplewriter"]},
@@ -661,11 +502,7 @@ def article_from_source_text(
 
     inferred_thesis = thesis_hint
     try:
-        llm = LLMClient()
-        if mock_mode:
-            os.environ["RIPPLEWRITER_MOCK"] = "1"
-        elif openai_key:
-            os.environ["OPENAI_API_KEY"] = openai_key
+        llm = studio_llm(mock_mode, openai_key)
 
         if not inferred_thesis:
             inferred_thesis = llm.complete(
@@ -678,17 +515,10 @@ def article_from_source_text(
 
         base["thesis"] = inferred_thesis or base["thesis"]
 
-        sections = llm.write_post_sections(
-            {
-                "title": base["title"],
-                "thesis": base["thesis"],
-                "audience": base["audience"],
-                "tone": base["tone"],
-                "outline": base.get("outline", []),
-                "claims": [],
-            }
-        )
+        prompt_fields = section_fields(base)
+        sections = llm.write_post_sections(prompt_fields)
         base["generated_sections"] = sections
+        base["generated_sections_hash"] = sections_fingerprint(prompt_fields)
 
     except Exception as e:
         base["thesis"] = inferred_thesis or base["thesis"]
@@ -704,6 +534,8 @@ def article_from_source_text(
     return base
 
 # --- Image ingest UI (paste + drag/drop) used ONLY on Source→Draft ---
+ASSET_STORE = AssetStore(ARTICLES_DIR / "images")
+
 def ui_image_ingest():
     st.markdown("### Paste or drop screenshots (images)")
 
@@ -737,13 +569,12 @@ def ui_image_ingest():
     #        pasted_img = _res  # direct PIL.Image
 
     if pasted_img is not None:
-        images_dir = ARTICLES_DIR / "images"
-        images_dir.mkdir(parents=True, exist_ok=True)
-        fname = f"pasted_{int(time.time())}.png"
-        save_path = images_dir / fname
-        pasted_img.save(save_path, format="PNG")
+        buf = io.BytesIO()
+        pasted_img.save(buf, format="PNG")
+        fname, created = ASSET_STORE.ingest(buf.getvalue(), ".png")
+        save_path = ASSET_STORE.path(fname)
         st.session_state["rw_images"].append({"filename": fname, "path": str(save_path)})
-        st.success(f"📸 Pasted image saved → articles/images/{fname}")
+        st.success(f"📸 Pasted image {'saved' if created else 'already stored'} → articles/images/{fname}")
         st.image(pasted_img, width=160, caption=fname)
 
     st.markdown("---")
@@ -760,14 +591,12 @@ def ui_image_ingest():
 
     if img_uploads:
         captured = []
-        images_dir = ARTICLES_DIR / "images"
-        images_dir.mkdir(parents=True, exist_ok=True)
         for f in img_uploads:
             try:
-                safe = pathlib.Path(f.name).name
-                dest = images_dir / safe
-                dest.write_bytes(f.getbuffer())
-                captured.append({"filename": safe, "path": str(dest)})
+                # Content-addressed: re-dropping the same file reuses the stored copy
+                fname, _ = ASSET_STORE.ingest(bytes(f.getbuffer()), pathlib.Path(f.name).suffix)
+                dest = ASSET_STORE.path(fname)
+                captured.append({"filename": fname, "path": str(dest), "original": pathlib.Path(f.name).name})
             except Exception as e:
                 st.warning(f"⚠️ Could not save image {f.name}: {e}")
         if captured:
@@ -784,7 +613,7 @@ def load_format_templates() -> Dict[str, Any]:
         st.warning("⚠️ No format templates found in /config/formats.yaml")
         return {}
     try:
-        return yaml.safe_load(FORMATS_FILE.read_text(encoding="utf-8")) or {}
+        return CONFIG_STORE.load(FORMATS_FILE)
     except Exception as e:
         st.error(f"Error reading formats.yaml: {e}")
         return {}
@@ -799,80 +628,13 @@ EQUATIONS_PATH = CONFIG_DIR / "equations.yaml"
 def load_equations() -> list[dict[str, Any]]:
     try:
         if EQUATIONS_PATH.exists():
-            cfg = yaml.safe_load(EQUATIONS_PATH.read_text(encoding="utf-8")) or {}
-            eqs = cfg.get("equations", [])
-            for e in eqs:
-                e.setdefault("id", e.get("name", "unnamed").lower().replace(" ", "-"))
-                e.setdefault("name", e.get("id", "Unnamed").title())
-                e.setdefault("desc", "")
-                e.setdefault("weights", {})
-            return eqs
+            # Frozen records with id/name/desc/weights defaults, cached until the file changes
+            return list(CONFIG_STORE.equation_list(EQUATIONS_PATH))
     except Exception as e:
         st.warning(f"Could not load equations.yaml: {e}")
     return [{"id": "none", "name": "None", "desc": "", "weights": {}}]
 
 
-def extract_claims_for_scoring(article: dict[str, Any]) -> list[str]:
-    claims = [c for c in article.get("claims", []) if isinstance(c, str) and c.strip()]
-    if not claims:
-        outline = article.get("outline", [])
-        claims.extend([o for o in outline if isinstance(o, str) and o.strip()])
-    if not claims:
-        gs = article.get("generated_sections", {})
-        for k in ("lede", "body", "counterpoints", "conclusion"):
-            txt = gs.get(k, "")
-            if isinstance(txt, str) and txt.strip():
-                claims.extend([s.strip() for s in txt.split(". ") if len(s.strip()) > 40][:3])
-    return claims[:8]
-
-
-def _score_signal(text: str, kind: str) -> float:
-    if not text:
-        return 0.0
-    t = text.lower()
-    if kind == "coherence":
-        dots = t.count("...") + t.count("??")
-        return max(0.0, 1.0 - min(1.0, dots / 3.0))
-    if kind == "evidence":
-        digits = sum(ch.isdigit() for ch in t)
-        refs = t.count("http") + t.count("doi") + t.count("source:")
-        return min(1.0, (digits * 0.02) + (refs * 0.25))
-    if kind == "novelty":
-        toks = [w.strip(".,:;!?'\"()[]") for w in t.split()]
-        uniq = len(set(toks))
-        return min(1.0, uniq / max(8, len(toks)))
-    if kind == "clarity":
-        sents = [s for s in t.replace("?", ".").replace("!", ".").split(".") if s.strip()]
-        if not sents:
-            return 0.5
-        lengths = [len(s.split()) for s in sents]
-        avg = sum(lengths) / len(lengths)
-        if 12 <= avg <= 22:
-            return 1.0
-        return max(0.0, 1.0 - (abs(avg - 17) / 25.0))
-    if kind == "sentiment":
-        pos = sum(w in t for w in ["excellent", "good", "clear", "strong", "improve", "win"])
-        neg = sum(w in t for w in ["bad", "poor", "unclear", "weak", "worse", "lose"])
-        total = pos + neg
-        if total == 0:
-            return 0.6
-        return max(0.0, min(1.0, (pos - neg) / total * 0.5 + 0.5))
-    return 0.5
-
-
-def compute_intention_scores(article: dict[str, Any], equation: dict[str, Any]) -> dict[str, Any]:
-    text_blob = " ".join(extract_claims_for_scoring(article))[:8000]
-    weights = equation.get("weights", {})
-    signals = {k: _score_signal(text_blob, k) for k in ("coherence", "evidence", "novelty", "clarity", "sentiment")}
-    overall = 0.0
-    total_w = 0.0
-    for k, w in weights.items():
-        overall += signals.get(k, 0.0) * float(w)
-        total_w += float(w)
-    ripple_score = overall / total_w if total_w > 0 else 0.0
-    return {"signals": signals, "ripple_score": ripple_score}
-
-
 # ---------- sidebar ----------
 st.sidebar.header("RippleWriter Studio")
 openai_key = st.sidebar.text_input("OpenAI API key (optional)", type="password")
@@ -1070,25 +832,24 @@ with tab_compose:
         with gen_cols[0]:
             if st.button("✍️ Generate sections with LLM", disabled=(choice == "(new)")):
                 try:
-                    llm = LLMClient()
-                    if mock_mode:
-                        os.environ["RIPPLEWRITER_MOCK"] = "1"
-                    elif openai_key:
-                        os.environ["OPENAI_API_KEY"] = openai_key
-
-                    to_send = default_article()
-                    # Only copy keys present in the currently loaded draft
-                    for k in ("title", "thesis", "audience", "tone", "outline", "claims",
-                              "format", "intention_equation"):
-                        if k in data:
-                            to_send[k] = data[k]
-
-                    sections = llm.write_post_sections(to_send)
+                    llm = studio_llm(mock_mode, openai_key)
+
+                    # Same normalization render.py fingerprints, so it can reuse these sections
+                    to_send = section_fields({**default_article(), **data})
+
+                    # Stream: show each section as soon as its header closes
+                    slots = {k: st.empty() for k in SECTION_KEYS}
+                    streamed: Dict[str, str] = {}
+                    for name, text in llm.stream_post_sections(to_send):
+                        streamed[name] = text
+                        slots[name].markdown(f"**{name.capitalize()}**\n\n{text}")
+
+                    sections = {k: streamed.get(k, "") for k in SECTION_KEYS}
                     data["generated_sections"] = sections
+                    data["generated_sections_hash"] = sections_fingerprint(to_send)
                     if choice != "(new)":
                         save_yaml(ARTICLES_DIR / choice, data)
                     st.success("Sections generated and saved into YAML (generated_sections).")
-                    st.json(sections)
 
                 except Exception as e:
                     st.error(f"LLM error: {e}")
@@ -1097,19 +858,13 @@ with tab_compose:
             # If no specific file selected, render all articles
             paths_arg = [str(ARTICLES_DIR / choice)] if choice != "(new)" else []
             if st.button("🛠️ Render this draft", disabled=(choice == "(new)")):
-                env_vars = {}
-                if openai_key:
-                    env_vars["OPENAI_API_KEY"] = openai_key
-                if mock_mode:
-                    env_vars["RIPPLEWRITER_MOCK"] = "1"
-
-                proc = render_selected(paths_arg, env_vars)
-                if proc.returncode == 0:
-                    st.success("Rendered successfully to /output.")
+                res = render_selected(paths_arg, mock_mode, openai_key)
+                if res.ok:
+                    st.success(f"Rendered successfully to /output ({res.elapsed * 1000:.0f} ms).")
                 else:
-                    st.error("Render failed.")
+                    st.error(f"Render failed: {res.error}")
                 with st.expander("Render logs"):
-                    st.code(proc.stdout + "\n" + proc.stderr)
+                    st.code(res.log_text)
 
     with colR:
         st.subheader("Preview (latest build)")
@@ -1135,14 +890,14 @@ with tab_compose:
                 save_yaml(ARTICLES_DIR / choice, data)
 
             # 3) Run your existing writer + renderer (LLM + render.py)
-            proc = write_render_refresh(choice if 'choice' in locals() else None, data, openai_key, mock_mode)
+            res = write_render_refresh(choice if 'choice' in locals() else None, data, openai_key, mock_mode)
 
             # 4) Show logs for transparency
             with st.expander("Write/Render logs"):
-                st.code((proc.stdout or "") + "\n" + (proc.stderr or ""))
+                st.code(res.log_text)
 
             # 5) Status + clickable output links
-            if proc.returncode == 0:
+            if res.ok:
                 slug = _guess_slug_from_yaml(data)
                 out_html, out_md = find_post_outputs(slug)
                 msg_lines = ["Rendered successfully to /output."]
@@ -1152,7 +907,7 @@ with tab_compose:
                     msg_lines.append(f"- View Markdown: [{slug}.md]({out_md.as_uri()})")
                 st.success("\n".join(msg_lines))
             else:
-                st.error("Render failed.")
+                st.error(f"Render failed: {res.error}")
             # 6) Refresh the embedded preview panel
             st.rerun()
         except Exception as e:
@@ -1186,19 +941,14 @@ def ensure_meta_signals(data: dict, eq_path, selected_eq):
     html_path = expected_output_html(choice if 'choice' in locals() else None, data)
 
     if st.button("🔁 Quick render & refresh preview", key="rw_quick_render"):
-        env_vars = {}
-        if openai_key:
-            env_vars["OPENAI_API_KEY"] = openai_key
-        if mock_mode:
-            env_vars["RIPPLEWRITER_MOCK"] = "1"
         paths_arg = [str(ARTICLES_DIR / choice)] if (choice and choice != "(new)") else []
-        proc = render_selected(paths_arg, env_vars)
-        if proc.returncode == 0:
+        res = render_selected(paths_arg, mock_mode, openai_key)
+        if res.ok:
             st.success("Rendered successfully.")
         else:
-            st.error("Render failed.")
+            st.error(f"Render failed: {res.error}")
         with st.expander("Render logs"):
-            st.code(proc.stdout + "\n" + proc.stderr)
+            st.code(res.log_text)
 
     if html_path.exists():
         try:
@@ -1387,24 +1137,26 @@ with tab_meta:
     colL, colR = st.columns([2, 1])
     with colL:
         if st.button("Calculate Ripple score", key="meta_calc"):
-            # Extract signals (your existing helper)
-            sig = extract_signals(article)
-
-            # Choose weights
-            if eq_choice == "None — Skip intention math.":
-                weights = {k: 1.0 for k in sig.keys()}  # equal weights
-            else:
-                weights = eq_dict.get(eq_choice, {}).get("weights", {}) or {}
-
-            score = apply_equation(sig, weights)
-
-            # Persist to YAML
-            article.setdefault("meta", {})
-            article["meta"]["ripple_score"] = round(float(score), 4)
-            article["meta"]["signals"] = {k: round(float(v), 4) for k, v in sig.items()}
-            article["meta"]["equation"] = eq_choice if eq_choice != "None — Skip intention math." else "none"
-
-            save_yaml(current_path, article)
+            # Equation picked via the shared "Intention Equation" selector
+            eq_choice = st.session_state.get(CURRENT_EQ_KEY, "none")
+            eq = next((e for e in load_equations() if e.get("id") == eq_choice), {})
+
+            # Choose weights ("none" or weightless equations → equal weights)
+            weights = {k: float(v) for k, v in (eq.get("weights") or {}).items()}
+            if eq_choice == "none" or not any(weights.values()):
+                weights = {k: 1.0 for k in SIGNALS}
+
+            # Memoized: same text + weights → stored score, no recomputation
+            sig, score, key = score_article(article, weights)
+
+            # Persist to YAML (skip the write if this exact score is already saved)
+            meta = article.setdefault("meta", {})
+            if meta.get("score_key") != key or meta.get("equation") != eq_choice:
+                meta["ripple_score"] = round(float(score), 4)
+                meta["signals"] = {k: round(float(v), 4) for k, v in sig.items()}
+                meta["equation"] = eq_choice
+                meta["score_key"] = key
+                save_yaml(current_path, article)
             st.success(f"Ripple score saved to YAML → meta.ripple_score = **{score:.3f}**")
 
             st.session_state["__last_meta_result__"] = {"score": score, "signals": sig, "weights": weights}
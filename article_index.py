@@ -0,0 +1,212 @@
+import os
+import json
+import pathlib
+import threading
+from typing import Dict, Any, List
+import yaml
+
+# --------------------------------------
+# Draft metadata index
+# --------------------------------------
+ROOT = pathlib.Path(__file__).parent
+ARTICLES = ROOT / "articles"
+DEFAULT_PATH = ROOT / ".cache" / "article-index.json"
+INDEX_VERSION = 1
+SUFFIXES = (".yaml", ".yml")
+
+
+def summarize(data: Any) -> Dict[str, Any]:
+    """The fields draft pickers and corpus views need from one article YAML."""
+    data = data if isinstance(data, dict) else {}
+    meta = data.get("meta") if isinstance(data.get("meta"), dict) else {}
+    score = meta.get("ripple_score")
+    return {
+        "title": data.get("title"),
+        "slug": data.get("slug"),
+        "date": str(data["date"]) if data.get("date") is not None else None,
+        "format": data.get("format"),
+        "equation": meta.get("equation") or data.get("intention_equation"),
+        "ripple_score": float(score) if isinstance(score, (int, float)) else None,
+    }
+
+
+class ArticleIndex:
+    """Name/title/slug/date/format/equation/ripple_score for every draft.
+
+    Kept in memory and persisted as one compact JSON file. sync() reconciles
+    with the articles folder, re-parsing only files whose mtime/size changed;
+    update() records a draft that was just saved; watch() keeps the index fresh
+    via a watchdog observer, so reads never touch the disk.
+    """
+
+    def __init__(self, articles_dir: pathlib.Path = ARTICLES, path: pathlib.Path = DEFAULT_PATH):
+        self.articles_dir = pathlib.Path(articles_dir)
+        self.path = pathlib.Path(path)
+        self.watching = False
+        self._observer = None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._names: List[str] | None = None
+        self._lock = threading.RLock()
+        self._load()
+
+    # --------------------------
+    # Persistence
+    # --------------------------
+    def _load(self) -> None:
+        try:
+            m = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if m.get("version") == INDEX_VERSION and m.get("articles_dir") == str(self.articles_dir.resolve()):
+            self._entries = m.get("entries", {})
+
+    def _save(self) -> None:
+        m = {"version": INDEX_VERSION, "articles_dir": str(self.articles_dir.resolve()), "entries": self._entries}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(m, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[WARN] Could not write article index: {e}")
+
+    # --------------------------
+    # Updates
+    # --------------------------
+    @staticmethod
+    def _stamp(st: os.stat_result) -> List[int]:
+        return [st.st_mtime_ns, st.st_size]
+
+    def _is_draft(self, p: pathlib.Path) -> bool:
+        return p.suffix.lower() in SUFFIXES and p.parent.resolve() == self.articles_dir.resolve()
+
+    def _parse(self, p: pathlib.Path) -> Dict[str, Any]:
+        try:
+            return summarize(yaml.safe_load(p.read_text(encoding="utf-8")))
+        except (OSError, yaml.YAMLError):
+            return summarize(None)
+
+    def _put(self, name: str, entry: Dict[str, Any]) -> None:
+        if self._entries.get(name) != entry:
+            if name not in self._entries:
+                self._names = None
+            self._entries[name] = entry
+
+    def sync(self) -> int:
+        """Reconcile with the folder; returns how many drafts were (re)parsed or dropped."""
+        self.articles_dir.mkdir(exist_ok=True)
+        changed = 0
+        with self._lock:
+            seen = set()
+            with os.scandir(self.articles_dir) as it:
+                for de in it:
+                    if not de.is_file() or not de.name.lower().endswith(SUFFIXES):
+                        continue
+                    seen.add(de.name)
+                    stamp = self._stamp(de.stat())
+                    old = self._entries.get(de.name)
+                    if old is None or old.get("stamp") != stamp:
+                        self._put(de.name, {**self._parse(pathlib.Path(de.path)), "stamp": stamp})
+                        changed += 1
+            for name in set(self._entries) - seen:
+                del self._entries[name]
+                self._names = None
+                changed += 1
+            if changed:
+                self._save()
+        return changed
+
+    def update(self, p: pathlib.Path | str, data: Dict[str, Any] | None = None) -> None:
+        """Index one draft; pass `data` when the caller just wrote it to skip the re-parse."""
+        p = pathlib.Path(p)
+        if not self._is_draft(p):
+            return
+        try:
+            stamp = self._stamp(p.stat())
+        except OSError:
+            self.remove(p)
+            return
+        with self._lock:
+            old = self._entries.get(p.name)
+            if data is None and old is not None and old.get("stamp") == stamp:
+                return
+            self._put(p.name, {**(summarize(data) if data is not None else self._parse(p)), "stamp": stamp})
+            self._save()
+
+    def remove(self, p: pathlib.Path | str) -> None:
+        name = pathlib.Path(p).name
+        with self._lock:
+            if self._entries.pop(name, None) is not None:
+                self._names = None
+                self._save()
+
+    # --------------------------
+    # Reads
+    # --------------------------
+    def names(self) -> List[str]:
+        """Sorted draft filenames (cached until a draft is added or removed)."""
+        if not self.watching:
+            self.sync()
+        with self._lock:
+            if self._names is None:
+                self._names = sorted(self._entries)
+            return list(self._names)
+
+    def get(self, name: str) -> Dict[str, Any] | None:
+        with self._lock:
+            e = self._entries.get(name)
+            return {"name": name, **e} if e is not None else None
+
+    def entries(self) -> List[Dict[str, Any]]:
+        if not self.watching:
+            self.sync()
+        with self._lock:
+            return [{"name": n, **self._entries[n]} for n in sorted(self._entries)]
+
+    # --------------------------
+    # File watcher
+    # --------------------------
+    def watch(self) -> bool:
+        """Follow the articles folder with watchdog; False (and sync-on-read) if unavailable."""
+        if self.watching:
+            return True
+        try:
+            from watchdog.observers import Observer  # lazy import
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return False
+
+        index = self
+
+        class Handler(FileSystemEventHandler):
+            def on_created(self, event):
+                if not event.is_directory:
+                    index.update(event.src_path)
+
+            on_modified = on_created
+
+            def on_deleted(self, event):
+                if not event.is_directory:
+                    index.remove(event.src_path)
+
+            def on_moved(self, event):
+                if not event.is_directory:
+                    index.remove(event.src_path)
+                    index.update(event.dest_path)
+
+        self.articles_dir.mkdir(exist_ok=True)
+        observer = Observer()
+        observer.schedule(Handler(), str(self.articles_dir), recursive=False)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        self.watching = True
+        self.sync()  # catch anything written before the observer started
+        return True
+
+    def close(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+        self.watching = False
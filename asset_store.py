@@ -0,0 +1,200 @@
+"""Content-addressed image store for articles/images/.
+
+Files are named by the SHA-256 of their bytes, so ingesting the same
+screenshot twice stores it once. publish() hard-links referenced images into
+output/images/ and gc() deletes images no article YAML mentions.
+
+The repo-root images/ folder predates the store; drafts still reference it as
+images/<name>. It is a read-only legacy source: find() resolves names there
+when the store lacks them, and publish() links those files too.
+
+    python asset_store.py dedupe     # rename existing images to hash names, rewrite YAML refs
+    python asset_store.py gc --dry-run
+"""
+from __future__ import annotations
+import os
+import re
+import sys
+import hashlib
+import pathlib
+import argparse
+import threading
+from typing import Dict, Any, Iterable, List, Set
+import yaml
+
+ROOT = pathlib.Path(__file__).parent
+ARTICLES = ROOT / "articles"
+STORE_DIR = ARTICLES / "images"
+LEGACY_DIRS = (ROOT / "images",)
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".gif", ".svg")
+HASH_NAME = re.compile(r"^[0-9a-f]{16}\.[a-z0-9]+$")
+PUBLISHED_NAME = re.compile(r"^[0-9a-f]{16}(-\d+)?\.[a-z0-9]+$")  # originals and their derivatives
+_EXT_ALIASES = {".jpeg": ".jpg"}
+
+
+def asset_name(data: bytes, ext: str) -> str:
+    ext = ext.lower() if ext.startswith(".") else f".{ext.lower()}"
+    return hashlib.sha256(data).hexdigest()[:16] + _EXT_ALIASES.get(ext, ext)
+
+
+def content_stem(path: pathlib.Path) -> str:
+    """Content-hash stem of a stored image (free for hash-named files)."""
+    path = pathlib.Path(path)
+    if HASH_NAME.match(path.name):
+        return path.name.split(".")[0]
+    return asset_name(path.read_bytes(), path.suffix).split(".")[0]
+
+
+def image_refs(data: Any) -> Set[str]:
+    """Basenames of every image path mentioned anywhere in an article dict."""
+    refs: Set[str] = set()
+    stack = [data]
+    while stack:
+        v = stack.pop()
+        if isinstance(v, dict):
+            stack.extend(v.values())
+        elif isinstance(v, (list, tuple)):
+            stack.extend(v)
+        elif isinstance(v, str) and v.lower().endswith(IMAGE_EXTS):
+            refs.add(pathlib.PurePath(v.replace("\\", "/")).name)
+    return refs
+
+
+def load_docs(p: pathlib.Path) -> List[Any]:
+    """All YAML documents in a draft (some drafts hold more than one)."""
+    try:
+        return list(yaml.safe_load_all(p.read_text(encoding="utf-8")))
+    except (OSError, yaml.YAMLError):
+        return []
+
+
+class AssetStore:
+    """Deduplicating image store; see module docstring."""
+
+    def __init__(self, root: pathlib.Path = STORE_DIR, legacy: Iterable[pathlib.Path] = ()):
+        self.root = pathlib.Path(root)
+        self.legacy = [pathlib.Path(d) for d in legacy]
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> pathlib.Path:
+        return self.root / name
+
+    def find(self, name: str) -> pathlib.Path | None:
+        """Where `name` lives: the store first, then the legacy folders."""
+        for d in [self.root, *self.legacy]:
+            if (d / name).is_file():
+                return d / name
+        return None
+
+    def ingest(self, data: bytes, ext: str) -> tuple[str, bool]:
+        """Store `data`; returns (filename, created). Identical bytes map to the same file."""
+        name = asset_name(data, ext)
+        dest = self.path(name)
+        with self._lock:
+            if dest.exists():
+                return name, False
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_name(f".{name}.{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, dest)
+        return name, True
+
+    def ingest_file(self, src: pathlib.Path) -> tuple[str, bool]:
+        src = pathlib.Path(src)
+        return self.ingest(src.read_bytes(), src.suffix)
+
+    # --------------------------
+    # References / GC
+    # --------------------------
+    def referenced(self, articles_dir: pathlib.Path = ARTICLES) -> Set[str]:
+        refs: Set[str] = set()
+        for p in pathlib.Path(articles_dir).glob("*.y*ml"):
+            for doc in load_docs(p):
+                refs |= image_refs(doc)
+        return refs
+
+    def gc(self, articles_dir: pathlib.Path = ARTICLES, dry_run: bool = False) -> List[str]:
+        """Delete stored images that no article references; returns their names."""
+        keep = self.referenced(articles_dir)
+        removed = []
+        for p in sorted(self.root.glob("*")):
+            if p.is_file() and p.suffix.lower() in IMAGE_EXTS and p.name not in keep:
+                removed.append(p.name)
+                if not dry_run:
+                    p.unlink()
+        return removed
+
+    def dedupe(self, articles_dir: pathlib.Path = ARTICLES, dry_run: bool = False) -> Dict[str, str]:
+        """One-off migration: rename legacy files to hash names (dropping duplicates)
+        and rewrite references in article YAMLs. Returns {old name: new name}."""
+        renames: Dict[str, str] = {}
+        for p in sorted(self.root.glob("*")):
+            if not p.is_file() or p.suffix.lower() not in IMAGE_EXTS or HASH_NAME.match(p.name):
+                continue
+            new = asset_name(p.read_bytes(), p.suffix)
+            renames[p.name] = new
+            if dry_run:
+                continue
+            if self.path(new).exists():
+                p.unlink()
+            else:
+                os.replace(p, self.path(new))
+        if renames and not dry_run:
+            for y in pathlib.Path(articles_dir).glob("*.y*ml"):
+                text = y.read_text(encoding="utf-8")
+                updated = re.sub(r"[^\s\"'/\\]+\.(?:png|jpe?g|webp|gif|svg)\b",
+                                 lambda m: renames.get(m.group(0), m.group(0)), text, flags=re.I)
+                if updated != text:
+                    y.write_text(updated, encoding="utf-8")
+        return renames
+
+    # --------------------------
+    # Publishing
+    # --------------------------
+    def publish(self, names: Iterable[str], dest: pathlib.Path, writer,
+                extra: Dict[str, pathlib.Path] | None = None) -> Set[str]:
+        """Link (or copy) stored images, plus `extra` {filename: path} files such as
+        derivatives, into `dest` via the OutputWriter. Previously published
+        hash-named files and copies of legacy images that are no longer
+        referenced are dropped.
+        Returns the names from `names` that exist in the store."""
+        dest = pathlib.Path(dest)
+        published = set()
+        for name in sorted(set(names)):
+            src = self.find(name)
+            if src is not None:
+                writer.link(src, dest / name)
+                published.add(name)
+        extra = extra or {}
+        for name, src in sorted(extra.items()):
+            writer.link(src, dest / name)
+        if dest.is_dir():
+            for p in dest.iterdir():
+                if p.name in published or p.name in extra:
+                    continue
+                if PUBLISHED_NAME.match(p.name) or any((d / p.name).is_file() for d in self.legacy):
+                    p.unlink()  # superseded, or a stale copy of an unreferenced legacy image
+        return published
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Maintain the content-addressed image store in articles/images/.")
+    ap.add_argument("command", choices=["dedupe", "gc"])
+    ap.add_argument("--dry-run", action="store_true", help="report what would change without touching files")
+    args = ap.parse_args(argv)
+
+    store = AssetStore()
+    if args.command == "dedupe":
+        renames = store.dedupe(dry_run=args.dry_run)
+        unique = len(set(renames.values()))
+        print(f"{len(renames)} legacy image(s) → {unique} unique file(s)"
+              f"{' (dry run)' if args.dry_run else ''}")
+    else:
+        removed = store.gc(dry_run=args.dry_run)
+        for name in removed:
+            print(f"  unreferenced: {name}")
+        print(f"{len(removed)} image(s) {'would be ' if args.dry_run else ''}removed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Offline benchmarks for scoring, YAML loading and rendering.
+
+Generates a synthetic corpus per (articles, words) case in a temp directory,
+times each stage and prints/writes JSON. Runs in mock mode; no API key needed.
+
+    python bench.py --articles 10,100,1000 --words 100,2000 --out bench.json
+    python bench.py --articles 100 --words 2000 --compare bench.json
+"""
+from __future__ import annotations
+import os
+os.environ.setdefault("RIPPLEWRITER_MOCK", "1")
+
+import sys, json, time, random, shutil, pathlib, argparse, platform, statistics, subprocess, tempfile
+from typing import Dict, Any, List, Callable
+import yaml
+
+import render
+import ripple_score
+from ripple_score import SIGNALS, extract_signals, compute_intention_scores, apply_equation
+from render import ROOT, Article, SiteBuilder, load_yaml
+
+STAGES = ("startup_cold", "startup_warm", "load_yaml", "extract_signals", "compute_intention_scores", "apply_equation", "render_post", "render_index")
+
+_VOCAB = ("ripple intention evidence signal clarity democracy policy data model growth risk study "
+          "outcome network context narrative research system effect result trend community").split()
+_PUNCT = (".", ".", ".", ",", ",", "!", "?", "...")
+
+# --------------------------------------
+# Synthetic corpus
+# --------------------------------------
+def synthetic_text(rng: random.Random, words: int) -> str:
+    """Prose with sentences, bullets, links and citation hints so every signal does real work."""
+    out: List[str] = []
+    for i in range(words):
+        w = rng.choice(_VOCAB)
+        if i % 97 == 0:
+            w = f"https://example.com/{w}/{i}"
+        elif i % 53 == 0:
+            w = f"{w} (source: study {i})"
+        elif i % 31 == 0:
+            w = str(rng.randint(1, 2025))
+        out.append(w + (rng.choice(_PUNCT) if i % 12 == 11 else ""))
+        if i % 120 == 119:
+            out.append("\n- ")
+    return " ".join(out)
+
+def synthetic_article(i: int, words: int, rng: random.Random) -> Dict[str, Any]:
+    quarter = max(1, words // 4)
+    return {
+        "title": f"Synthetic Article {i}",
+        "author": "Bench",
+        "date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+        "slug": f"synthetic-{i}",
+        "thesis": synthetic_text(rng, 20),
+        "audience": "general readers",
+        "tone": "plain-spoken",
+        "outline": ["Lede: hook", "Body: main points", "Counterpoints & limits", "Conclusion"],
+        "claims": [{"claim": synthetic_text(rng, max(25, words // 20))} for _ in range(5)],  # scorer caps at 8000 chars
+        "publish": {"category": rng.choice(("oped", "research", "news")), "tags": rng.sample(_VOCAB, 3)},
+        "generated_sections": {k: synthetic_text(rng, quarter)
+                               for k in ("lede", "body", "counterpoints", "conclusion")},
+    }
+
+def build_corpus(root: pathlib.Path, count: int, words: int, seed: int) -> List[pathlib.Path]:
+    rng = random.Random(seed)
+    (root / "articles").mkdir(parents=True)
+    shutil.copytree(ROOT / "templates", root / "templates")
+    shutil.copytree(ROOT / "config", root / "config")
+    paths = []
+    for i in range(count):
+        p = root / "articles" / f"synthetic-{i}.yaml"
+        p.write_text(yaml.safe_dump(synthetic_article(i, words, rng), sort_keys=False, allow_unicode=True),
+                     encoding="utf-8")
+        paths.append(p)
+    return paths
+
+# --------------------------------------
+# Timing
+# --------------------------------------
+def reset_caches() -> None:
+    """Drop scoring memos so every repeat measures a cold run."""
+    ripple_score.clear_stats_cache()
+    ripple_score._MEMO.clear()
+
+def timed(fn: Callable[..., Any], repeat: int, setup: Callable[[], Any] | None = None) -> Dict[str, float]:
+    """Time `fn` `repeat` times; `setup`, if given, runs untimed before each run and its result is passed to `fn`."""
+    runs = []
+    for _ in range(repeat):
+        reset_caches()
+        args = (setup(),) if setup else ()
+        t0 = time.perf_counter()
+        fn(*args)
+        runs.append(time.perf_counter() - t0)
+    return {"min": min(runs), "median": statistics.median(runs), "max": max(runs)}
+
+def run_case(count: int, words: int, repeat: int, seed: int) -> Dict[str, Any]:
+    weights = {k: 1.0 for k in SIGNALS}
+    equation = {"weights": weights}
+    with tempfile.TemporaryDirectory(prefix="ripple-bench-") as tmp:
+        root = pathlib.Path(tmp)
+        paths = build_corpus(root, count, words, seed)
+        builder = SiteBuilder(root=root, output=root / "output")
+        builder.posts_dir.mkdir(parents=True, exist_ok=True)
+
+        articles = [Article(**load_yaml(p)).model_dump() for p in paths]
+        # extract_claims_for_scoring reads plain claim strings, not the {"claim": ...} dicts drafts store
+        claim_articles = [{**a, "claims": [c["claim"] for c in a["claims"]]} for a in articles]
+        signals = [extract_signals(a) for a in articles]
+        sections = [a["generated_sections"] for a in articles]
+        metas = [builder.render_post(a, s) for a, s in zip(articles, sections)]
+        outputs = iter(range(1, 1 << 30))
+
+        def fresh_builder() -> SiteBuilder:
+            # New output folder per run, so pages are really written instead of skipped as unchanged
+            b = SiteBuilder(root=root, output=root / f"output-{next(outputs)}")
+            b.publish_static()
+            return b
+
+        def startup(cold: bool) -> None:
+            render._ENVS.clear()  # as in a fresh process
+            if cold:
+                shutil.rmtree(root / ".cache" / "jinja", ignore_errors=True)
+            SiteBuilder(root=root, output=root / "output").precompile()
+
+        stages = {
+            "startup_cold": timed(lambda: startup(True), repeat),
+            "startup_warm": timed(lambda: startup(False), repeat),
+            "load_yaml": timed(lambda: [load_yaml(p) for p in paths], repeat),
+            "extract_signals": timed(lambda: [extract_signals(a) for a in articles], repeat),
+            "compute_intention_scores": timed(lambda: [compute_intention_scores(a, equation) for a in claim_articles], repeat),
+            "apply_equation": timed(lambda: [apply_equation(s, weights) for s in signals], repeat),
+            "render_post": timed(lambda b: [b.render_post(a, s) for a, s in zip(articles, sections)], repeat, fresh_builder),
+            "render_index": timed(lambda b: b.render_index(metas), repeat, fresh_builder),
+        }
+    for t in stages.values():
+        t["per_article_ms"] = t["median"] / count * 1000
+    return {"articles": count, "words": words, "stages": stages}
+
+# --------------------------------------
+# Reporting
+# --------------------------------------
+def git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def case_id(c: Dict[str, Any]) -> str:
+    return f"{c['articles']}x{c['words']}"
+
+def print_table(results: Dict[str, Any], baseline: Dict[str, Any] | None) -> None:
+    base = {case_id(c): c for c in (baseline or {}).get("cases", [])}
+    for case in results["cases"]:
+        print(f"\n{case['articles']} articles × {case['words']} words")
+        old = base.get(case_id(case), {}).get("stages", {})
+        for name in STAGES:
+            t = case["stages"][name]
+            line = f"  {name:<26} {t['median'] * 1000:>10.2f} ms  ({t['per_article_ms']:.3f} ms/article)"
+            if name in old and old[name]["median"] > 0:
+                line += f"  {t['median'] / old[name]['median']:.2f}x vs {baseline.get('commit') or 'baseline'}"
+            print(line)
+
+def parse_sizes(s: str) -> List[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark Ripple scoring and rendering on a synthetic corpus.")
+    ap.add_argument("--articles", type=parse_sizes, default=[10, 100], help="comma-separated article counts (10..10000)")
+    ap.add_argument("--words", type=parse_sizes, default=[100, 2000], help="comma-separated words per article (100..20000)")
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per stage (default: 3)")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--out", help="write JSON results here (default: stdout)")
+    ap.add_argument("--compare", help="earlier JSON results to print ratios against")
+    args = ap.parse_args(argv)
+
+    results = {
+        "commit": git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "cases": [run_case(n, w, max(1, args.repeat), args.seed) for n in args.articles for w in args.words],
+    }
+
+    baseline = json.loads(pathlib.Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    if args.out:
+        pathlib.Path(args.out).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print_table(results, baseline)
+    elif baseline:
+        print_table(results, baseline)
+    else:
+        print(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
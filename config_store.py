@@ -0,0 +1,130 @@
+import os
+import pathlib
+import threading
+from types import MappingProxyType
+from typing import Dict, Any, Callable, Mapping, Tuple
+import yaml
+
+# --------------------------------------
+# Cached, mtime-validated config loading
+# --------------------------------------
+CONFIG_DIR = pathlib.Path(__file__).parent / "config"
+
+
+def freeze(obj: Any) -> Any:
+    """Read-only copy: dicts become mappingproxies, lists become tuples."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+def normalize_equations_obj(eq_all: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Accepts multiple YAML shapes and returns a dict:
+    { "EquationName": {"weights": {...}}, ... }
+    """
+    # Case A1: {"equations": {...}}   (already a dict)
+    if isinstance(eq_all, dict) and isinstance(eq_all.get("equations"), dict):
+        return eq_all["equations"]
+
+    # Case A2: {"equations": [...]}   (list; normalize it)
+    if isinstance(eq_all, dict) and isinstance(eq_all.get("equations"), list):
+        return normalize_equations_obj(eq_all["equations"])
+
+    # Case B: already a dict of equations
+    if isinstance(eq_all, dict):
+        return eq_all
+
+    # Case C: list forms → coerce to dict
+    out: Dict[str, Dict[str, Any]] = {}
+    if isinstance(eq_all, list):
+        for item in eq_all:
+            # [{id/name, weights}, ...]
+            if isinstance(item, dict) and ("id" in item or "name" in item):
+                key = str(item.get("id") or item.get("name"))
+                out[key] = {"weights": item.get("weights", {})}
+            # [{"EqName": {...}}]  OR [{"EqName": {"weights": {...}}}]
+            elif isinstance(item, dict):
+                for k, v in item.items():
+                    if isinstance(v, dict):
+                        out[str(k)] = v
+    return out
+
+
+def equation_records(raw: Any) -> list:
+    """equations.yaml `equations:` list with id/name/desc/weights always present."""
+    eqs = raw.get("equations", []) if isinstance(raw, dict) else []
+    out = []
+    for e in eqs if isinstance(eqs, list) else []:
+        if not isinstance(e, dict):
+            continue
+        e = dict(e)
+        e.setdefault("id", e.get("name", "unnamed").lower().replace(" ", "-"))
+        e.setdefault("name", e.get("id", "Unnamed").title())
+        e.setdefault("desc", "")
+        e.setdefault("weights", {})
+        out.append(e)
+    return out
+
+
+class ConfigStore:
+    """Parses each YAML file once and hands out frozen results.
+
+    Every lookup stats the file; the parsed value (and anything derived from it,
+    e.g. normalized equations) is reused until its mtime or size changes. Cheap
+    enough to call on every Streamlit rerun.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Tuple[Tuple[int, int] | None, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stamp(path: pathlib.Path) -> Tuple[int, int] | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def view(self, path: pathlib.Path | str, fn: Callable[[Any], Any] | None = None) -> Any:
+        """Frozen `fn(parsed YAML)` for `path` (the parsed YAML itself if fn is None).
+        A missing file parses as None; YAML errors propagate and are not cached."""
+        path = pathlib.Path(path).resolve()
+        key = (str(path), getattr(fn, "__qualname__", ""))
+        stamp = self._stamp(path)
+        with self._lock:
+            hit = self._entries.get(key)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+
+        raw = yaml.safe_load(path.read_text(encoding="utf-8")) if stamp else None
+        value = freeze(fn(raw) if fn else raw)
+        with self._lock:
+            self._entries[key] = (stamp, value)
+        return value
+
+    def load(self, path: pathlib.Path | str) -> Mapping[str, Any]:
+        """Top-level mapping of a YAML file ({} when missing or empty)."""
+        return self.view(path, _as_mapping)
+
+    def equations(self, path: pathlib.Path | str = CONFIG_DIR / "equations.yaml") -> Mapping[str, Mapping[str, Any]]:
+        """normalize_equations_obj() of equations.yaml: {id: {"weights": {...}}}."""
+        return self.view(path, normalize_equations_obj)
+
+    def equation_list(self, path: pathlib.Path | str = CONFIG_DIR / "equations.yaml") -> Tuple[Mapping[str, Any], ...]:
+        """Equation records in file order, each with id/name/desc/weights."""
+        return self.view(path, equation_records)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _as_mapping(raw: Any) -> Dict[str, Any]:
+    return raw if isinstance(raw, dict) else {}
+
+
+STORE = ConfigStore()
@@ -0,0 +1,157 @@
+import os
+import json
+import pathlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, List, Sequence, Tuple
+
+from asset_store import AssetStore, content_stem
+
+# --------------------------------------
+# Responsive image derivatives
+# --------------------------------------
+DEFAULT_WIDTHS = (480, 960, 1600)
+RASTER_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+
+
+def make_derivatives(src: str, cache_dir: str, widths: Sequence[int]) -> Dict[str, Any]:
+    """Resize one image to WebP plus a PNG/JPEG fallback at each width (never upscaling).
+
+    Runs in a worker process. Outputs are named after the source's content hash,
+    and a JSON sidecar records the dimensions, so an unchanged image is never
+    reprocessed on later builds.
+    """
+    from PIL import Image  # lazy import: only builds with images need Pillow
+
+    src_p, cache = pathlib.Path(src), pathlib.Path(cache_dir)
+    stem = content_stem(src_p)
+    fallback_ext = ".jpg" if src_p.suffix.lower() in (".jpg", ".jpeg") else ".png"
+    cache.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(src_p) as im:
+        im.load()
+        W, H = im.size
+        targets = sorted({w for w in widths if w < W} | {min(W, max(widths))})
+        variants = []
+        for w in targets:
+            h = max(1, round(H * w / W))
+            resized = im if w == W else im.resize((w, h), Image.LANCZOS)
+            webp, fallback = f"{stem}-{w}.webp", f"{stem}-{w}{fallback_ext}"
+            resized.save(cache / webp, "WEBP", quality=80, method=4)
+            if fallback_ext == ".jpg":
+                resized.convert("RGB").save(cache / fallback, "JPEG", quality=82, optimize=True, progressive=True)
+            else:
+                resized.save(cache / fallback, "PNG", compress_level=6)
+            variants.append({"width": w, "height": h, "webp": webp, "fallback": fallback})
+
+    info = {"width": W, "height": H, "variants": variants}
+    sidecar = cache / f"{stem}.json"
+    tmp = sidecar.with_name(f".{sidecar.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(info), encoding="utf-8")
+    os.replace(tmp, sidecar)
+    return info
+
+
+class DerivativeCache:
+    """Looks up / produces derivatives for source images, fanning misses out
+    over a process pool. `info(name)` is None for images that cannot be
+    processed (SVG, missing file, Pillow not installed).
+
+    Results are remembered per source file stamp (path, mtime, size): an image
+    that was missing is looked up again next time, and one that failed is
+    retried once its file changes, so long-lived builders pick up new images.
+    """
+
+    def __init__(self, store: AssetStore, cache_dir: pathlib.Path,
+                 widths: Sequence[int] = DEFAULT_WIDTHS, workers: int | None = None):
+        self.store = store
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.widths = tuple(sorted({int(w) for w in widths})) or DEFAULT_WIDTHS
+        self.workers = workers
+        self.processed = 0
+        self.errors: List[str] = []
+        self._info: Dict[str, Tuple[Tuple[str, int, int], Dict[str, Any] | None]] = {}
+        self._lock = threading.Lock()  # one prepare() at a time, so two threads never write the same files
+
+    def _sidecar(self, src: pathlib.Path) -> pathlib.Path:
+        return self.cache_dir / f"{content_stem(src)}.json"
+
+    def _cached(self, src: pathlib.Path) -> Dict[str, Any] | None:
+        try:
+            info = json.loads(self._sidecar(src).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        wanted = {w for w in self.widths if w < info["width"]} | {min(info["width"], max(self.widths))}
+        if {v["width"] for v in info["variants"]} != wanted:
+            return None  # widths setting changed
+        if not all((self.cache_dir / v[k]).exists() for v in info["variants"] for k in ("webp", "fallback")):
+            return None
+        return info
+
+    def prepare(self, names: Iterable[str]) -> None:
+        """Make sure every image in `names` has derivatives; misses run in parallel."""
+        with self._lock:
+            todo: List[str] = []
+            stamps: Dict[str, Tuple[str, int, int]] = {}
+            sources: Dict[str, pathlib.Path] = {}
+            for name in sorted(set(names)):
+                src = self.store.find(name)
+                if src is None or src.suffix.lower() not in RASTER_EXTS:
+                    self._info.pop(name, None)  # not remembered: the file may be added later
+                    continue
+                st = src.stat()
+                stamp = (str(src), st.st_mtime_ns, st.st_size)
+                hit = self._info.get(name)
+                if hit is not None and hit[0] == stamp:
+                    continue
+                info = self._cached(src)
+                if info is None:
+                    todo.append(name)
+                    stamps[name], sources[name] = stamp, src
+                else:
+                    self._info[name] = (stamp, info)
+            if not todo:
+                return
+            try:
+                import PIL  # noqa: F401
+            except ImportError:
+                self.errors.append("Pillow is not installed; images are published without derivatives")
+                self._info.update({n: (stamps[n], None) for n in todo})
+                return
+
+            workers = min(len(todo), self.workers or os.cpu_count() or 1)
+            jobs = [(str(sources[n]), str(self.cache_dir), self.widths) for n in todo]
+            if workers <= 1:
+                results = [self._safe(make_derivatives, *job) for job in jobs]
+            else:
+                # spawn, not fork: Studio and serve are multi-threaded, and forking them can deadlock
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    futures = [pool.submit(make_derivatives, *job) for job in jobs]
+                    results = [self._safe(f.result) for f in futures]
+            for name, info in zip(todo, results):
+                self._info[name] = (stamps[name], info)  # a failure is retried once the file changes
+                if info is not None:
+                    self.processed += 1
+
+    def _safe(self, fn, *args) -> Dict[str, Any] | None:
+        try:
+            return fn(*args)
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+            return None
+
+    def info(self, name: str) -> Dict[str, Any] | None:
+        self.prepare([name])
+        hit = self._info.get(name)
+        return hit[1] if hit is not None else None
+
+    def files(self, names: Iterable[str]) -> Dict[str, pathlib.Path]:
+        """{output filename: cached path} for every derivative of `names`."""
+        out: Dict[str, pathlib.Path] = {}
+        for name in names:
+            info = self.info(name)
+            for v in (info or {}).get("variants", []):
+                for k in ("webp", "fallback"):
+                    out[v[k]] = self.cache_dir / v[k]
+        return out
@@ -0,0 +1,114 @@
+import os
+import json
+import hashlib
+import pathlib
+import threading
+from typing import Dict, Any
+
+# --------------------------------------
+# Persistent LLM response cache
+# --------------------------------------
+DEFAULT_DIR = pathlib.Path(__file__).parent / ".cache" / "llm"
+
+
+class ResponseCache:
+    """On-disk, content-addressed cache of LLM completions.
+
+    One JSON file per response, named by the SHA-256 of the request, so the
+    Studio process and render.py subprocesses share hits. Writes are atomic
+    (temp file + rename); file mtime doubles as the LRU clock, and the oldest
+    entries are evicted once the cache grows past `max_bytes`. The size is
+    tracked as entries are written, so the folder is only scanned when an
+    eviction is due; evicting down to `LOW_WATER` of the budget keeps that rare.
+    """
+
+    LOW_WATER = 0.9
+
+    def __init__(self, root: pathlib.Path | str = DEFAULT_DIR, max_bytes: int = 64 * 1024 * 1024):
+        self.root = pathlib.Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size: int | None = None  # running estimate; None until the first scan
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, temperature: float, system: str, user: str) -> str:
+        payload = json.dumps([model, temperature, system, user], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        p = self._path(key)
+        try:
+            text = json.loads(p.read_text(encoding="utf-8"))["text"]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(p)  # mark as recently used
+        except OSError:
+            pass  # read-only cache dir, or evicted meanwhile: the read still counts
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        p = self._path(key)
+        data = json.dumps({"text": text}, ensure_ascii=False).encode("utf-8")
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                old = p.stat().st_size
+            except OSError:
+                old = 0
+            tmp = p.with_name(f"{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, p)
+        except OSError as e:
+            print(f"[WARN] Could not write LLM cache entry: {e}")
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[0]
+            else:
+                self._size += len(data) - old
+            due = self._size > self.max_bytes
+        if due:
+            self._evict()
+
+    def _scan(self) -> tuple[int, list]:
+        """(total bytes, [(mtime, size, path), ...]) over every cached entry."""
+        entries = []
+        total = 0
+        for p in self.root.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        return total, entries
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until the cache is back under LOW_WATER of max_bytes.
+        Rescans the folder, which also picks up entries other processes wrote."""
+        with self._lock:
+            total, entries = self._scan()
+            target = int(self.max_bytes * self.LOW_WATER)
+            if total > self.max_bytes:
+                for _, size, p in sorted(entries):
+                    try:
+                        p.unlink()
+                    except OSError:
+                        continue
+                    total -= size
+                    if total <= target:
+                        break
+            self._size = total
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses}
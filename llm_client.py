@@ -1,8 +1,12 @@
 ﻿import os
+import time
+import hashlib
+import threading
 import textwrap
-import yaml
 import pathlib
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Tuple
+from llm_cache import ResponseCache, DEFAULT_DIR
+from config_store import STORE as CONFIG_STORE
 
 # --------------------------------------
 # Config loader
@@ -12,7 +16,7 @@ def load_settings() -> dict:
     cfg_path = pathlib.Path(__file__).parent / "config" / "settings.yaml"
     if cfg_path.exists():
         try:
-            return yaml.safe_load(cfg_path.read_text(encoding="utf-8")) or {}
+            return CONFIG_STORE.load(cfg_path)
         except Exception as e:
             print(f"[WARN] Failed to read settings.yaml: {e}")
     return {}
@@ -20,6 +24,218 @@ def load_settings() -> dict:
 SETTINGS = load_settings()
 USE_MOCK = os.getenv("RIPPLEWRITER_MOCK", "0") == "1" or SETTINGS.get("mock", False)
 MODEL = os.getenv("RIPPLEWRITER_MODEL", SETTINGS.get("model", "gpt-4.1-mini"))
+# Artificial per-call latency (seconds) for mock mode, to exercise parallel rendering offline
+MOCK_DELAY = float(os.getenv("RIPPLEWRITER_MOCK_DELAY", "0") or 0)
+TEMPERATURE = 0.6
+# Persistent response cache (opt out with RIPPLEWRITER_NO_CACHE=1 or `llm_cache: false`)
+USE_CACHE = os.getenv("RIPPLEWRITER_NO_CACHE", "0") != "1" and SETTINGS.get("llm_cache", True)
+CACHE_DIR = os.getenv("RIPPLEWRITER_CACHE_DIR", str(DEFAULT_DIR))
+CACHE_MAX_MB = float(SETTINGS.get("llm_cache_max_mb", 64))
+# Shared keep-alive HTTP pool for OpenAI calls
+HTTP_POOL_SIZE = int(SETTINGS.get("http_pool_size", 10))
+HTTP_TIMEOUT = float(SETTINGS.get("http_timeout", 120))
+HTTP_CONNECT_TIMEOUT = float(SETTINGS.get("http_connect_timeout", 10))
+# Provider rate limits (0 = unlimited); calls queue instead of hitting 429s
+RATE_LIMIT_RPM = int(SETTINGS.get("rate_limit_rpm", 0))
+RATE_LIMIT_TPM = int(SETTINGS.get("rate_limit_tpm", 0))
+# Completion tokens budgeted per call (700–1100 words ≈ 1.5k tokens)
+RATE_LIMIT_OUTPUT_TOKENS = int(SETTINGS.get("rate_limit_output_tokens", 1500))
+
+# --------------------------------------
+# Section prompts & parsing
+# --------------------------------------
+SECTION_KEYS = ("lede", "body", "counterpoints", "conclusion")
+
+# Used when a draft leaves these blank; the Studio's new-draft template starts from them too
+SECTION_DEFAULTS: Dict[str, Any] = {
+    "audience": "general readers",
+    "tone": "plain-spoken",
+    "outline": ["Lede: hook, why now", "Body: main points", "Counterpoints & limits", "Conclusion"],
+}
+
+def section_fields(y: Dict[str, Any]) -> Dict[str, Any]:
+    """The draft fields the section prompt reads, with SECTION_DEFAULTS filled in.
+    Studio and render.py both go through this, so the same draft always yields
+    the same prompt (and sections_fingerprint) whichever side builds it."""
+    return {
+        "title": y.get("title"),
+        "thesis": y.get("thesis"),
+        "audience": y.get("audience") or SECTION_DEFAULTS["audience"],
+        "tone": y.get("tone") or SECTION_DEFAULTS["tone"],
+        "outline": list(y.get("outline") or SECTION_DEFAULTS["outline"]),
+        "claims": list(y.get("claims") or []),
+    }
+
+def section_prompts(y: Dict[str, Any]) -> tuple[str, str]:
+    """Build the (system, user) prompts write_post_sections sends for a draft."""
+    y = section_fields(y)
+    system = (
+        "You are RippleWriter, a concise op-ed drafter. Structure output as:\n"
+        "Lede:\nBody:\nCounterpoints:\nConclusion:\n"
+        "Follow the provided thesis, tone, audience, and outline. Keep between 700–1100 words."
+    )
+
+    user = (
+        f"Title: {y.get('title')}\n"
+        f"Thesis: {y.get('thesis')}\n"
+        f"Audience: {y.get('audience')}\n"
+        f"Tone: {y.get('tone')}\n"
+        f"Outline: {'; '.join(y.get('outline', []))}\n"
+        f"Claims: {'; '.join([c.get('claim', '') for c in y.get('claims', [])])}"
+    )
+    return system, user
+
+def sections_fingerprint(y: Dict[str, Any]) -> str:
+    """Hash of the section prompt (thesis, outline, claims, ...).
+    Stored next to `generated_sections` so render.py can tell whether they are stale."""
+    system, user = section_prompts(y)
+    return hashlib.sha256(f"{system}\0{user}".encode("utf-8")).hexdigest()
+
+class SectionParser:
+    """Incremental parser for `Lede:` / `Body:` / `Counterpoints:` / `Conclusion:` output.
+
+    feed() accepts arbitrary text chunks and returns the (name, text) of every
+    section that was closed by a following header; close() flushes the last one.
+    """
+
+    def __init__(self):
+        self.sections = {k: "" for k in SECTION_KEYS}
+        self.current: str | None = None
+        self._buf = ""
+
+    def _line(self, line: str) -> List[Tuple[str, str]]:
+        low = line.strip().lower()
+        for name in SECTION_KEYS:
+            if low.startswith(name + ":"):
+                closed = [(self.current, self.sections[self.current].strip())] if self.current else []
+                self.current = name
+                self.sections[name] += line.split(":", 1)[1].strip() + "\n"
+                return closed
+        if self.current:
+            self.sections[self.current] += line + "\n"
+        return []
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        self._buf += chunk
+        *lines, self._buf = self._buf.split("\n")
+        closed: List[Tuple[str, str]] = []
+        for line in lines:
+            closed += self._line(line.rstrip("\r"))
+        return closed
+
+    def close(self) -> List[Tuple[str, str]]:
+        closed = self._line(self._buf) if self._buf else []
+        self._buf = ""
+        if self.current:
+            closed.append((self.current, self.sections[self.current].strip()))
+            self.current = None
+        return closed
+
+    def result(self) -> Dict[str, str]:
+        return {k: v.strip() for k, v in self.sections.items()}
+
+# OpenAI exception class names worth retrying (matched by name to keep the import lazy)
+TRANSIENT_ERRORS = {"RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError"}
+
+def is_transient(exc: BaseException) -> bool:
+    """True for errors a retry with backoff can fix (rate limits, timeouts, 5xx)."""
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(exc).__mro__)
+
+# --------------------------------------
+# Rate-limit scheduler
+# --------------------------------------
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English prose)."""
+    return max(1, len(text) // 4)
+
+class RateLimiter:
+    """Keeps calls under requests-per-minute and tokens-per-minute budgets.
+
+    Tracks a sliding window of (timestamp, tokens) for admitted calls;
+    acquire() blocks the caller until one more call fits in both budgets.
+    A call larger than the whole token budget is admitted once the window is empty.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0, window: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self._events: List[Tuple[float, int]] = []
+        self._cond = threading.Condition()
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.requests = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm > 0 or self.tpm > 0
+
+    def _delay(self, tokens: int, now: float) -> float:
+        """Seconds until a call of `tokens` fits (0 if it fits now)."""
+        self._events = [e for e in self._events if now - e[0] < self.window]
+        if not self._events:
+            return 0.0
+        waits = []
+        if self.rpm > 0 and len(self._events) >= self.rpm:
+            waits.append(self._events[len(self._events) - self.rpm][0] + self.window - now)
+        if self.tpm > 0:
+            used = sum(t for _, t in self._events)
+            for ts, t in self._events:
+                if used + tokens <= self.tpm:
+                    break
+                used -= t
+                waits.append(ts + self.window - now)
+        return max(waits, default=0.0)
+
+    def acquire(self, tokens: int) -> float:
+        """Block until the call fits; returns the seconds spent waiting."""
+        if not self.enabled:
+            return 0.0
+        t0 = time.monotonic()
+        with self._cond:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self._delay(tokens, now)
+                    if delay <= 0:
+                        self._events.append((now, tokens))
+                        break
+                    self._cond.wait(delay)
+            finally:
+                self.queue_depth -= 1
+            waited = time.monotonic() - t0
+            self.requests += 1
+            if waited > 0.001:
+                self.waited += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def reset_peaks(self) -> None:
+        """Start a new measurement window for max_queue_depth / max_wait (e.g. per build)."""
+        with self._cond:
+            self.max_queue_depth = self.queue_depth
+            self.max_wait = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "queued": self.waited,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "total_wait": round(self.total_wait, 3),
+            "max_wait": round(self.max_wait, 3),
+        }
+
+# One scheduler per process: provider limits apply to the API key, not to a client object
+RATE_LIMITER = RateLimiter(RATE_LIMIT_RPM, RATE_LIMIT_TPM)
 
 # --------------------------------------
 # LLM Client Class
@@ -27,20 +243,46 @@ MODEL = os.getenv("RIPPLEWRITER_MODEL", SETTINGS.get("model", "gpt-4.1-mini"))
 class LLMClient:
     """Handles text generation with OpenAI or mock fallback."""
 
-    def __init__(self):
-        self.use_mock = USE_MOCK or (os.getenv("OPENAI_API_KEY") is None)
+    def __init__(self, use_cache: bool | None = None, refresh_cache: bool = False,
+                 use_mock: bool | None = None, api_key: str | None = None):
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if use_mock is None:
+            use_mock = USE_MOCK or (api_key is None)
+        self.use_mock = use_mock
         if not self.use_mock:
             from openai import OpenAI  # lazy import
-            self.client = OpenAI()
+            self.client = OpenAI(api_key=api_key, http_client=shared_http_client())
             print(f"[INIT] Using OpenAI model: {MODEL}")
         else:
             print("[INIT] Using mock mode (no API key detected)")
 
+        if use_cache is None:
+            use_cache = USE_CACHE
+        self.cache = ResponseCache(CACHE_DIR, int(CACHE_MAX_MB * 1024 * 1024)) if use_cache else None
+        # refresh_cache: ignore cached responses but still store the fresh ones
+        self.refresh_cache = refresh_cache
+        self.limiter = RATE_LIMITER
+
     # --------------------------
     # Mock Mode
     # --------------------------
     def _mock(self, prompt: str) -> str:
         """Return a deterministic mock draft for offline testing."""
+        if MOCK_DELAY > 0:
+            time.sleep(MOCK_DELAY)
+        return self._mock_text(prompt)
+
+    def _mock_stream(self, prompt: str, chunk_size: int = 16) -> Iterator[str]:
+        """Yield the mock draft in small chunks, spreading MOCK_DELAY across them."""
+        text = self._mock_text(prompt)
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        for c in chunks:
+            if MOCK_DELAY > 0:
+                time.sleep(MOCK_DELAY / len(chunks))
+            yield c
+
+    @staticmethod
+    def _mock_text(prompt: str) -> str:
         return textwrap.dedent(f"""
         [MOCKED DRAFT]
         {prompt[:240]}...
@@ -59,63 +301,121 @@ class LLMClient:
     # Real Mode
     # --------------------------
     def complete(self, system: str, user: str) -> str:
-        """Send structured system/user messages to the model."""
+        """Send structured system/user messages to the model (cached on disk)."""
+        if self.cache is None:
+            return self._complete(system, user)
+
+        key = ResponseCache.key("mock" if self.use_mock else MODEL, TEMPERATURE, system, user)
+        text = None if self.refresh_cache else self.cache.get(key)
+        if text is None:
+            text = self._complete(system, user)
+            self.cache.put(key, text)
+        return text
+
+    def _complete(self, system: str, user: str) -> str:
         if self.use_mock:
             return self._mock(user)
 
+        self.limiter.acquire(estimate_tokens(system + user) + RATE_LIMIT_OUTPUT_TOKENS)
         resp = self.client.chat.completions.create(
             model=MODEL,
             messages=[
                 {"role": "system", "content": system},
                 {"role": "user", "content": user},
             ],
-            temperature=0.6,
+            temperature=TEMPERATURE,
         )
         return resp.choices[0].message.content.strip()
 
+    # --------------------------
+    # Streaming
+    # --------------------------
+    def stream(self, system: str, user: str) -> Iterator[str]:
+        """Like complete(), but yields the response as it arrives.
+        A cached response is yielded in one piece; a fresh one is cached once finished."""
+        key = ResponseCache.key("mock" if self.use_mock else MODEL, TEMPERATURE, system, user)
+        if self.cache is not None and not self.refresh_cache:
+            text = self.cache.get(key)
+            if text is not None:
+                yield text
+                return
+
+        parts: List[str] = []
+        for piece in self._stream(system, user):
+            parts.append(piece)
+            yield piece
+        if self.cache is not None:
+            self.cache.put(key, "".join(parts).strip())
+
+    def _stream(self, system: str, user: str) -> Iterator[str]:
+        if self.use_mock:
+            yield from self._mock_stream(user)
+            return
+
+        self.limiter.acquire(estimate_tokens(system + user) + RATE_LIMIT_OUTPUT_TOKENS)
+        resp = self.client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            temperature=TEMPERATURE,
+            stream=True,
+        )
+        for chunk in resp:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
     # --------------------------
     # RippleWriter Section Builder
     # --------------------------
     def write_post_sections(self, y: Dict[str, Any]) -> Dict[str, str]:
         """Generate structured op-ed sections based on YAML input."""
-        system = (
-            "You are RippleWriter, a concise op-ed drafter. Structure output as:\n"
-            "Lede:\nBody:\nCounterpoints:\nConclusion:\n"
-            "Follow the provided thesis, tone, audience, and outline. Keep between 700–1100 words."
-        )
+        system, user = section_prompts(y)
+        parser = SectionParser()
+        parser.feed(self.complete(system, user))
+        parser.close()
+        return parser.result()
 
-        user = (
-            f"Title: {y.get('title')}\n"
-            f"Thesis: {y.get('thesis')}\n"
-            f"Audience: {y.get('audience')}\n"
-            f"Tone: {y.get('tone')}\n"
-            f"Outline: {'; '.join(y.get('outline', []))}\n"
-            f"Claims: {'; '.join([c.get('claim', '') for c in y.get('claims', [])])}"
-        )
+    def stream_post_sections(self, y: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+        """Streaming write_post_sections: yields (section, text) as soon as each
+        section's closing header arrives, e.g. the lede while the body is still generating."""
+        system, user = section_prompts(y)
+        parser = SectionParser()
+        for piece in self.stream(system, user):
+            yield from parser.feed(piece)
+        yield from parser.close()
+
+# --------------------------------------
+# Process-wide client registry
+# --------------------------------------
+_HTTP_CLIENT = None
+_CLIENTS: Dict[Tuple[bool, str | None], LLMClient] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+def shared_http_client():
+    """One httpx.Client (keep-alive pool) for every OpenAI client in the process,
+    so repeated calls reuse TLS connections instead of re-handshaking."""
+    global _HTTP_CLIENT
+    with _REGISTRY_LOCK:
+        if _HTTP_CLIENT is None:
+            import httpx  # lazy import (ships with openai)
+            _HTTP_CLIENT = httpx.Client(
+                limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+                timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            )
+        return _HTTP_CLIENT
 
-        full = self.complete(system, user)
-        sections = {"lede": "", "body": "", "counterpoints": "", "conclusion": ""}
-        current = None
-
-        for line in full.splitlines():
-            low = line.strip().lower()
-            if low.startswith("lede:"):
-                current = "lede"
-                sections[current] += line.split(":", 1)[1].strip() + "\n"
-                continue
-            if low.startswith("body:"):
-                current = "body"
-                sections[current] += line.split(":", 1)[1].strip() + "\n"
-                continue
-            if low.startswith("counterpoints:"):
-                current = "counterpoints"
-                sections[current] += line.split(":", 1)[1].strip() + "\n"
-                continue
-            if low.startswith("conclusion:"):
-                current = "conclusion"
-                sections[current] += line.split(":", 1)[1].strip() + "\n"
-                continue
-            if current:
-                sections[current] += line + "\n"
-
-        return {k: v.strip() for k, v in sections.items()}
+def get_client(use_mock: bool | None = None, api_key: str | None = None) -> LLMClient:
+    """Return the shared LLMClient for this mock/API-key combination, creating it once.
+    Prefer this over LLMClient() anywhere a client is needed more than once per process."""
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if use_mock is None:
+        use_mock = USE_MOCK or (api_key is None)
+    key = (use_mock, None if use_mock else api_key)
+    client = _CLIENTS.get(key)
+    if client is None:
+        client = LLMClient(use_mock=use_mock, api_key=api_key)
+        with _REGISTRY_LOCK:
+            client = _CLIENTS.setdefault(key, client)
+    return client
@@ -0,0 +1,130 @@
+import os
+import hashlib
+import pathlib
+import threading
+from typing import Dict, Any, Iterable, List
+
+# --------------------------------------
+# Atomic, write-if-changed output files
+# --------------------------------------
+CHUNK = 1 << 16
+
+
+def file_digest(path: pathlib.Path) -> str | None:
+    h = hashlib.sha256()
+    try:
+        with path.open("rb") as f:
+            for block in iter(lambda: f.read(CHUNK), b""):
+                h.update(block)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+class OutputWriter:
+    """Writes site files via temp file + rename, leaving identical files untouched.
+
+    Unchanged outputs keep their mtime, so git sees no diff, Pages keeps its
+    caches and readers never see a half-written page. `written` / `skipped`
+    list the paths handled since the last reset().
+    """
+
+    def __init__(self, root: pathlib.Path | None = None):
+        self.root = pathlib.Path(root) if root else None
+        self.written: List[str] = []
+        self.skipped: List[str] = []
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.written = []
+            self.skipped = []
+            self.bytes_written = 0
+
+    def _label(self, path: pathlib.Path) -> str:
+        if self.root is not None:
+            try:
+                return path.relative_to(self.root).as_posix()
+            except ValueError:
+                pass
+        return path.as_posix()
+
+    def _record(self, path: pathlib.Path, changed: bool, size: int) -> bool:
+        with self._lock:
+            if changed:
+                self.written.append(self._label(path))
+                self.bytes_written += size
+            else:
+                self.skipped.append(self._label(path))
+        return changed
+
+    @staticmethod
+    def _tmp(path: pathlib.Path) -> pathlib.Path:
+        return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def write_bytes(self, path: pathlib.Path, data: bytes) -> bool:
+        """Returns True if the file was (re)written, False if it already held `data`."""
+        path = pathlib.Path(path)
+        try:
+            same = path.stat().st_size == len(data) and file_digest(path) == hashlib.sha256(data).hexdigest()
+        except OSError:
+            same = False
+        if same:
+            return self._record(path, False, 0)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._tmp(path)
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return self._record(path, True, len(data))
+
+    def write_text(self, path: pathlib.Path, text: str) -> bool:
+        return self.write_bytes(path, text.encode("utf-8"))
+
+    def write_chunks(self, path: pathlib.Path, chunks: Iterable[str]) -> bool:
+        """Stream text chunks to a temp file while hashing; keep it only if the content changed."""
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._tmp(path)
+        h = hashlib.sha256()
+        size = 0
+        try:
+            with tmp.open("wb") as f:
+                for chunk in chunks:
+                    b = chunk.encode("utf-8")
+                    h.update(b)
+                    size += len(b)
+                    f.write(b)
+            if file_digest(path) == h.hexdigest():
+                tmp.unlink()
+                return self._record(path, False, 0)
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return self._record(path, True, size)
+
+    def copy(self, src: pathlib.Path, dst: pathlib.Path) -> bool:
+        return self.write_bytes(dst, pathlib.Path(src).read_bytes())
+
+    def link(self, src: pathlib.Path, dst: pathlib.Path) -> bool:
+        """Hard-link `src` to `dst` so large assets are shared, not duplicated;
+        falls back to a copy where links are unsupported (e.g. across devices)."""
+        src, dst = pathlib.Path(src), pathlib.Path(dst)
+        try:
+            if os.path.samefile(src, dst):
+                return self._record(dst, False, 0)
+        except OSError:
+            pass
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._tmp(dst)
+        try:
+            os.link(src, tmp)
+        except OSError:
+            return self.copy(src, dst)
+        os.replace(tmp, dst)
+        return self._record(dst, True, 0)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"written": len(self.written), "skipped": len(self.skipped), "bytes_written": self.bytes_written}
@@ -1,25 +1,32 @@
 ﻿from __future__ import annotations
-import os, sys, glob, pathlib, datetime
-from typing import Dict, Any, List
+import os, re, sys, glob, gzip, json, hashlib, argparse, pathlib, datetime, time, threading, traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Tuple
+from urllib.parse import quote
 import yaml
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+from markupsafe import Markup, escape
 from pydantic import BaseModel, Field, ValidationError
-from llm_client import LLMClient
+from config_store import STORE as CONFIG_STORE
+from output_writer import OutputWriter
+from asset_store import AssetStore, image_refs
+from image_derivatives import DerivativeCache, DEFAULT_WIDTHS
+from llm_client import LLMClient, SECTION_KEYS, get_client, sections_fingerprint, is_transient
 
 ROOT = pathlib.Path(__file__).parent
 ARTICLES = ROOT / "articles"
 OUTPUT = ROOT / "output"
 TEMPLATES = ROOT / "templates"
-POSTS_DIR = OUTPUT / "posts"
 CONFIG = ROOT / "config" / "settings.yaml"
-
-env = Environment(
-    loader=FileSystemLoader(str(TEMPLATES)),
-    autoescape=select_autoescape(["html", "xml", "md"])
-)
-
-OUTPUT.mkdir(exist_ok=True)
-POSTS_DIR.mkdir(parents=True, exist_ok=True)
+MANIFEST_NAME = "build-manifest.json"  # under .cache/, so it is neither deployed nor committed
+LEGACY_MANIFEST = ".build-manifest.json"  # older builds kept it in output/
+MANIFEST_VERSION = 1
+ASSET_MANIFEST = "asset-manifest.json"
+STATIC_EXTS = (".css", ".js")
+HASHED_STATIC_RE = re.compile(r"(?P<asset>(?P<stem>.+)\.[0-9a-f]{10}(?P<ext>\.css|\.js))(?:\.gz|\.br)?")
+SITEMAP_MAX_URLS = 50000
+TEXT_EXTS = (".html", ".css", ".js", ".json", ".xml", ".md", ".txt", ".svg")
 
 class Article(BaseModel):
     title: str
@@ -33,107 +40,1034 @@ class Article(BaseModel):
     claims: List[Dict[str, Any]] = Field(default_factory=list)
     images: List[Dict[str, Any]] = Field(default_factory=list)
     publish: Dict[str, Any] = Field(default_factory=dict)
+    generated_sections: Dict[str, Any] = Field(default_factory=dict)
+    generated_sections_hash: str | None = None
 
 def load_yaml(p: pathlib.Path) -> Dict[str, Any]:
     with p.open("r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
-def load_settings() -> Dict[str, Any]:
-    return load_yaml(CONFIG) if CONFIG.exists() else {}
+def load_settings(path: pathlib.Path = CONFIG) -> Dict[str, Any]:
+    return CONFIG_STORE.load(path)
+
+def manifest_path(root: pathlib.Path, output: pathlib.Path) -> pathlib.Path:
+    """Build manifest for `output`: .cache/build-manifest.json for the default
+    output/, a name keyed by the output path for any other folder."""
+    output = pathlib.Path(output).resolve()
+    if output == (pathlib.Path(root) / "output").resolve():
+        return pathlib.Path(root) / ".cache" / MANIFEST_NAME
+    key = hashlib.sha256(str(output).encode("utf-8")).hexdigest()[:10]
+    return pathlib.Path(root) / ".cache" / f"build-manifest-{key}.json"
 
 def slugify(s: str) -> str:
     return "".join(c.lower() if c.isalnum() else "-" for c in s).strip("-")
 
-def render_post(y: Dict[str, Any], sections: Dict[str, str]) -> Dict[str, Any]:
-    template = env.get_template("post.md.j2")
-    ctx = {**y, **sections}
-    md = template.render(**ctx)
-
-    date = y.get("date") or datetime.date.today().isoformat()
-    slug = y.get("slug") or slugify(y.get("title", "post"))
-
-    md_path = POSTS_DIR / f"{slug}.md"
-    md_path.write_text(md, encoding="utf-8")
-
-    # Escape newlines BEFORE putting into f-string to avoid backslash issues
-    def esc(text: str) -> str:
-        return text.replace("\\n", "<br/>").replace("\n", "<br/>")
-
-    lede = esc(sections.get("lede", ""))
-    body = esc(sections.get("body", ""))
-    counter = esc(sections.get("counterpoints", ""))
-    concl = esc(sections.get("conclusion", ""))
-
-    html = f"""<!doctype html>
-<html><head>
-  <meta charset='utf-8'>
-  <meta name='viewport' content='width=device-width, initial-scale=1'>
-  <title>{y.get('title')}</title>
-  <link rel='stylesheet' href='../styles.css' />
-</head>
-<body>
-  <main>
-    <p><a href='../index.html'>← Back</a></p>
-    <h1>{y.get('title')}</h1>
-    <p><small>{date} — {y.get('author','')}</small></p>
-    <article>
-      <h2>Lede</h2>
-      <p>{lede}</p>
-      <h2>Body</h2>
-      <p>{body}</p>
-      <h2>Counterpoints & Limits</h2>
-      <p>{counter}</p>
-      <h2>Conclusion</h2>
-      <p>{concl}</p>
-      <hr/>
-      <h3>Notes & Sources</h3>
-      <ul>
-        <li>Audience: {y.get('audience','')}</li>
-        <li>Tone: {y.get('tone','')}</li>
-      </ul>
-    </article>
-  </main>
-</body></html>"""
-
-    html_path = POSTS_DIR / f"{slug}.html"
-    html_path.write_text(html, encoding="utf-8")
-
-    return {"title": y.get("title"), "date": date, "slug": slug}
-
-def render_index(posts: List[Dict[str, Any]]):
-    template = env.get_template("index.html.j2")
-    posts = sorted(posts, key=lambda p: p["date"], reverse=True)
-    html = template.render(posts=posts)
-    (OUTPUT / "index.html").write_text(html, encoding="utf-8")
-    (OUTPUT / "styles.css").write_text((TEMPLATES / "styles.css").read_text(encoding="utf-8"), encoding="utf-8")
-
-def main(paths: List[str] | None = None):
-    _ = load_settings()
-    llm = LLMClient()
-
-    yaml_files: List[str] = []
-    if paths:
-        for p in paths:
-            yaml_files += glob.glob(p)
-    else:
-        yaml_files = glob.glob(str(ARTICLES / "*.yml")) + glob.glob(str(ARTICLES / "*.yaml"))
-
-    posts_meta: List[Dict[str, Any]] = []
-    for yf in yaml_files:
-        raw = load_yaml(pathlib.Path(yf))
+def term_slug(name: Any) -> str:
+    """Page stem for a category or tag; names without letters or digits get a short hash."""
+    name = str(name)
+    return slugify(name) or "t-" + hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+
+def concurrency_limit(settings: Dict[str, Any]) -> int:
+    """Max parallel LLM calls: RIPPLEWRITER_CONCURRENCY env > settings.yaml > 4."""
+    raw = os.getenv("RIPPLEWRITER_CONCURRENCY", settings.get("concurrency", 4))
+    try:
+        return max(1, int(raw))
+    except (TypeError, ValueError):
+        return 1
+
+_NEWLINE_RE = re.compile(r"\\n|\n")
+
+def nl2br(text: Any) -> Markup:
+    """Jinja filter: escape `text`, turning real and literal "\\n" newlines into <br/>."""
+    return Markup("<br/>").join(escape(part) for part in _NEWLINE_RE.split(str(text)))
+
+_ENVS: Dict[Tuple[str, str], Environment] = {}
+_ENV_LOCK = threading.Lock()
+
+def jinja_env(templates: pathlib.Path, cache_dir: pathlib.Path | None = None) -> Environment:
+    """One Jinja Environment per templates folder per process, so compiled
+    templates survive across SiteBuilders. With `cache_dir`, compiled bytecode
+    is also kept on disk and reused by the next process."""
+    key = (str(templates), str(cache_dir or ""))
+    with _ENV_LOCK:
+        env = _ENVS.get(key)
+        if env is None:
+            bcc = None
+            if cache_dir is not None:
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                bcc = FileSystemBytecodeCache(str(cache_dir))
+            env = _ENVS[key] = Environment(
+                loader=FileSystemLoader(str(templates)),
+                autoescape=select_autoescape(["html", "xml", "md", "html.j2", "xml.j2"]),
+                bytecode_cache=bcc,
+            )
+            env.filters["nl2br"] = nl2br
+            env.filters["slugify"] = slugify
+            env.filters["term_slug"] = term_slug
+            env.filters["iso_date"] = iso_date
+        return env
+
+_CSS_STRING = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+_CSS_TOKEN = re.compile(_CSS_STRING.pattern + r"|/\*.*?\*/", re.S)  # whichever starts first wins
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+
+def minify_css(css: str) -> str:
+    """Drop comments, BOM and redundant whitespace/semicolons; quoted strings
+    (e.g. `content: "a , b"`) are left as-is."""
+    css = _CSS_TOKEN.sub(lambda m: m.group(1) or "", css.lstrip("\ufeff"))
+    parts = _CSS_STRING.split(css)  # odd items are the strings
+    for i in range(0, len(parts), 2):
+        part = _CSS_PUNCT.sub(r"\1", _CSS_SPACE.sub(" ", parts[i]))
+        parts[i] = part.replace(": ", ":").replace(";}", "}")
+    return "".join(parts).strip()
+
+def iso_date(d: Any) -> str:
+    """RFC 3339 timestamp for a post date ("2025-10-31" → "2025-10-31T00:00:00Z")."""
+    d = str(d)
+    return d if "T" in d else f"{d}T00:00:00Z"
+
+_WORD_RE = re.compile(r"[^\W_]+")
+STOPWORDS = frozenset("a an and are as at be but by for from has have in is it its not of on or "
+                      "that the this to was were will with".split())
+
+def search_terms(*texts: Any) -> List[str]:
+    """Sorted unique lowercase words (2+ characters, no stopwords) for the search index.
+    templates/search.js splits queries the same way."""
+    words = {w for t in texts if t for w in _WORD_RE.findall(str(t).lower())}
+    return sorted(w for w in words if len(w) > 1 and w not in STOPWORDS)
+
+def stats_delta(before: Dict[str, Any], after: Dict[str, Any], counters: Tuple[str, ...] | None = None) -> Dict[str, Any]:
+    """`after` with the cumulative `counters` (default: all numeric keys) reduced by `before`."""
+    keys = counters if counters is not None else [k for k, v in after.items() if isinstance(v, (int, float))]
+    return {**after, **{k: after[k] - before.get(k, 0) for k in keys}}
+
+def generate_sections(llm: LLMClient, articles: List[Dict[str, Any]], workers: int) -> List[Tuple[Dict[str, str], float]]:
+    """Fan write_post_sections out over a bounded thread pool.
+    Returns (sections, seconds) per article, in the same order as `articles`."""
+    def _one(y: Dict[str, Any]) -> Tuple[Dict[str, str], float]:
+        t0 = time.perf_counter()
+        sections = llm.write_post_sections(y)
+        return sections, time.perf_counter() - t0
+
+    if workers <= 1 or len(articles) <= 1:
+        return [_one(y) for y in articles]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_one, articles))
+
+def stored_sections(y: Dict[str, Any]) -> Dict[str, str] | None:
+    """Sections already saved in the YAML by the Studio, if they match the current prompt."""
+    gen = y.get("generated_sections") or {}
+    if not gen or y.get("generated_sections_hash") != sections_fingerprint(y):
+        return None
+    return {k: str(gen.get(k) or "") for k in SECTION_KEYS}
+
+# --------------------------------------
+# Build engine
+# --------------------------------------
+@dataclass
+class BuildResult:
+    """Outcome of one SiteBuilder.build() / run_batch() call."""
+    ok: bool = True
+    rendered: List[Dict[str, Any]] = field(default_factory=list)   # meta of posts written this run
+    unchanged: int = 0
+    failed: List[str] = field(default_factory=list)                # batch jobs that did not finish
+    written: List[str] = field(default_factory=list)               # output files whose content changed
+    skipped: List[str] = field(default_factory=list)               # output files left untouched (same content)
+    logs: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+    error: str | None = None
+
+    @property
+    def log_text(self) -> str:
+        return "\n".join(self.logs)
+
+class SiteBuilder:
+    """Renders article YAMLs into the static site.
+
+    Holds the Jinja environment, settings and one long-lived LLMClient, so the
+    Studio can keep a builder around and render in-process instead of
+    spawning `python render.py` per click.
+    """
+
+    def __init__(self, root: pathlib.Path = ROOT, output: pathlib.Path | None = None,
+                 llm: LLMClient | None = None, echo: bool = False):
+        self.root = pathlib.Path(root)
+        self.articles_dir = self.root / "articles"
+        self.templates = self.root / "templates"
+        self.config = self.root / "config" / "settings.yaml"
+        self.output = pathlib.Path(output) if output else self.root / "output"
+        self.posts_dir = self.output / "posts"
+        self.manifest_path = manifest_path(self.root, self.output)
+        self.echo = echo
+        self._llm = llm
+        self.writer = OutputWriter(self.output)
+        self.assets: Dict[str, str] = {}
+        self.force_precompress = False  # --precompress, on top of the `precompress` setting
+        # Drafts may still point at the pre-store images/ folder; it is resolved as a legacy source
+        self.store = AssetStore(self.articles_dir / "images", legacy=[self.root / "images"])
+        self.images: DerivativeCache | None = None
+        self._settings_view = None
+        self.refresh_settings()
+        self._logs: List[str] = []
+        self._lock = threading.Lock()
+
+    def refresh_settings(self) -> bool:
+        """Re-read settings.yaml and rebuild what derives from it (Jinja bytecode
+        cache, image widths/workers). CONFIG_STORE stats the file, so this is cheap
+        when nothing changed; returns True when the settings were reloaded.
+        An assignment to `self.settings` stays in effect until the file changes."""
+        view = load_settings(self.config)
+        if view is self._settings_view:
+            return False
+        self._settings_view = self.settings = view
+        use_bcc = view.get("jinja_bytecode_cache", True)
+        self.env = jinja_env(self.templates, self.root / ".cache" / "jinja" if use_bcc else None)
+        images = DerivativeCache(self.store, self.root / ".cache" / "images",
+                                 widths=view.get("image_widths") or DEFAULT_WIDTHS,
+                                 workers=view.get("image_workers"))
+        if self.images is None or (images.widths, images.workers) != (self.images.widths, self.images.workers):
+            self.images = images
+        return True
+
+    @property
+    def compress_output(self) -> bool:
+        return self.force_precompress or bool(self.settings.get("precompress", False))
+
+    @property
+    def llm(self) -> LLMClient:
+        """Created on first use, so no-op builds never construct a client."""
+        if self._llm is None:
+            self._llm = get_client()
+        return self._llm
+
+    def log(self, msg: str) -> None:
+        self._logs.append(msg)
+        if self.echo:
+            print(msg)
+
+    # --------------------------
+    # Pages
+    # --------------------------
+    def precompile(self) -> int:
+        """Load every template in templates/ up front (from bytecode cache when warm).
+        Later get_template() calls are in-memory lookups plus an mtime check."""
+        t0 = time.perf_counter()
+        names = self.env.list_templates(filter_func=lambda n: n.endswith(".j2"))
+        for name in names:
+            self.env.get_template(name)
+        self.log(f"Templates: {len(names)} ready in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        return len(names)
+
+    def render_post(self, y: Dict[str, Any], sections: Dict[str, str]) -> Dict[str, Any]:
+        ctx = {**y, **sections, "figures": self.figures(y), "assets": self.assets or self.publish_static()}
+        date = y.get("date") or datetime.date.today().isoformat()
+        slug = y.get("slug") or slugify(y.get("title", "post"))
+
+        # Stream both pages chunk by chunk instead of materializing them as strings
+        self.writer.write_chunks(self.posts_dir / f"{slug}.md", self.env.get_template("post.md.j2").generate(**ctx))
+        self.writer.write_chunks(self.posts_dir / f"{slug}.html",
+                                 self.env.get_template("post.html.j2").generate(**{**ctx, "date": date}))
+
+        publish = y.get("publish") or {}
+        meta = {"title": y.get("title"), "date": date, "slug": slug, "summary": y.get("thesis"),
+                "category": publish.get("category") or None, "tags": [str(t) for t in publish.get("tags") or []],
+                "images": sorted(image_refs(y.get("images")))}
+        # Tokenized once per rendered post and kept in the manifest, so index builds only merge lists
+        meta["terms"] = search_terms(meta["title"], meta["summary"], meta["category"], *meta["tags"])
+        return meta
+
+    def publish_static(self) -> Dict[str, str]:
+        """Minify templates/*.css, write content-hashed copies of it and of
+        templates/*.js (styles.<hash>.css, search.<hash>.js) plus
+        asset-manifest.json, and return {logical name: hashed name}.
+
+        Hashed files never change, so hosts can cache them forever; the plain
+        name is still written for hand-made pages that link it directly."""
+        assets: Dict[str, str] = {}
+        for src in sorted(self.templates.iterdir()):
+            if src.suffix not in STATIC_EXTS or not src.is_file():
+                continue
+            text = src.read_text(encoding="utf-8-sig")
+            data = (minify_css(text) if src.suffix == ".css" else text).encode("utf-8")
+            hashed = f"{src.stem}.{hashlib.sha256(data).hexdigest()[:10]}{src.suffix}"
+            self.writer.write_bytes(self.output / hashed, data)
+            self.writer.write_bytes(self.output / src.name, data)
+            assets[src.name] = hashed
+        self.writer.write_text(self.output / ASSET_MANIFEST, json.dumps(assets, indent=1, sort_keys=True))
+        self.assets = assets
+        return assets
+
+    def prune_static(self) -> None:
+        """Delete superseded fingerprints of the static assets, with their .gz/.br.
+        Only safe once every post links the current ones, i.e. after a full build."""
+        current = set((self.assets or self.publish_static()).values())
+        for old in self.output.iterdir():
+            m = HASHED_STATIC_RE.fullmatch(old.name)
+            if m and m["stem"] + m["ext"] in self.assets and m["asset"] not in current:
+                old.unlink()
+
+    def figures(self, y: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Template data for the post's `images`: srcset of the cached derivatives,
+        intrinsic width/height, alt text and caption."""
+        sizes = self.settings.get("image_sizes", "(max-width: 800px) 100vw, 800px")
+        out = []
+        for img in y.get("images") or []:
+            if not isinstance(img, dict) or not img.get("path"):
+                continue
+            name = pathlib.PurePath(str(img["path"]).replace("\\", "/")).name
+            fig = {"src": f"../images/{name}", "alt": img.get("alt") or img.get("caption") or "",
+                   "caption": img.get("caption"), "credit": img.get("credit"), "sizes": sizes}
+            info = self.images.info(name)
+            if info:
+                vs = info["variants"]
+                fig.update(src=f"../images/{vs[-1]['fallback']}", width=vs[-1]["width"], height=vs[-1]["height"],
+                           srcset=", ".join(f"../images/{v['fallback']} {v['width']}w" for v in vs),
+                           srcset_webp=", ".join(f"../images/{v['webp']} {v['width']}w" for v in vs))
+            out.append(fig)
+        return out
+
+    def prepare_images(self, articles: List[Dict[str, Any]]) -> None:
+        """Generate missing derivatives for all `articles` at once, in a process pool."""
+        names = {n for y in articles for n in image_refs(y.get("images"))}
+        if not names:
+            return
+        t0 = time.perf_counter()
+        before = self.images.processed
+        self.images.prepare(names)
+        self.log(f"Images: {self.images.processed - before} processed, "
+                 f"{len(names) - (self.images.processed - before)} cached/skipped "
+                 f"in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        for err in self.images.errors:
+            self.log(f"  image warning: {err}")
+        self.images.errors.clear()
+
+    def render_index(self, posts: List[Dict[str, Any]]):
+        """Paginated home page, per-category and per-tag pages, feed.json, feed.xml
+        (Atom), sitemap.xml and search-index.json, all from one date-sorted pass
+        over the post metadata."""
+        posts = sorted(posts, key=lambda p: p["date"], reverse=True)
+        # Grouped by page slug, not name: "C" and "C++" share category/c.html instead of overwriting it
+        terms: Dict[str, Dict[str, Tuple[List[str], List[Dict[str, Any]]]]] = {"category": {}, "tag": {}}
+        for p in posts:
+            named = [("category", p["category"])] if p.get("category") else []
+            for kind, name in named + [("tag", t) for t in p.get("tags") or []]:
+                names, items = terms[kind].setdefault(term_slug(name), ([], []))
+                if name not in names:
+                    names.append(name)
+                if not items or items[-1] is not p:
+                    items.append(p)
+
+        template = self.env.get_template("index.html.j2")
+        listings = [(self.output, "index", "./", None, posts)]
+        for kind, label in (("category", "Category"), ("tag", "Tag")):
+            listings += [(self.output / kind, slug, "../", f"{label}: {' / '.join(map(str, names))}", items)
+                         for slug, (names, items) in terms[kind].items()]
+        keep: set = set()
+        home = self.site_url()
+        absolute = home.startswith(("http://", "https://"))  # sitemaps and Atom ids need absolute URLs
+        urls: List[Tuple[str, str | None]] = []  # sitemap (loc, lastmod)
+        for folder, stem, base, heading, items in listings:
+            pages = self.paginate(template, items, folder, stem, base, heading, atom=absolute)
+            keep.update(pages)
+            lastmod = iso_date(items[0]["date"]) if items else None
+            urls += [(home + quote(p.relative_to(self.output).as_posix()), lastmod) for p in pages]
+        urls += [(home + post_path(p["slug"]), iso_date(p["date"])) for p in posts]
+
+        self.writer.write_text(self.output / "feed.json", json.dumps(self.json_feed(posts), indent=1, ensure_ascii=False))
+        if absolute:
+            feed = self.env.get_template("feed.xml.j2").generate(
+                posts=posts[:max(0, int(self.settings.get("feed_items", 50)))], home=home,
+                site_name=self.settings.get("site_name", "RippleWriter"),
+                updated=iso_date(posts[0]["date"]) if posts else iso_date(datetime.date.today()))
+            self.writer.write_chunks(self.output / "feed.xml", feed)
+            keep |= self.write_sitemap(urls)
+        else:
+            # In GitHub Actions, surface it as a workflow annotation rather than a buried log line
+            prefix = "::warning::" if os.getenv("GITHUB_ACTIONS") else "Warning: "
+            self.log(f"{prefix}site_url / RIPPLEWRITER_SITE_URL is not set; "
+                     "skipping feed.xml and sitemap.xml (they need absolute URLs)")
+            for stale in (self.output / "feed.xml", self.output / "sitemap.xml"):
+                stale.unlink(missing_ok=True)
+        self.writer.write_text(self.output / "search-index.json",
+                               json.dumps(self.search_index(posts), ensure_ascii=False, separators=(",", ":")))
+
+        # Drop listing pages left over from categories/tags/pages that no longer exist
+        for pattern in ("index-*.html", "category/*.html", "tag/*.html", "sitemap-*.xml"):
+            for f in self.output.glob(pattern):
+                if f not in keep:
+                    f.unlink()
+
+    def site_url(self) -> str:
+        """Site root used in feeds and the sitemap: `site_url` (origin) + `base_url`,
+        or RIPPLEWRITER_SITE_URL, a full root such as actions/configure-pages' base_url."""
+        env = os.getenv("RIPPLEWRITER_SITE_URL", "").strip()
+        if env:
+            return env.rstrip("/") + "/"
+        base = str(self.settings.get("base_url") or "/").strip("/")
+        origin = str(self.settings.get("site_url") or "").rstrip("/")
+        return f"{origin}/{base}/" if base else f"{origin}/"
+
+    def write_sitemap(self, urls: List[Tuple[str, str | None]]) -> set:
+        """sitemap.xml, or a sitemap index over sitemap-N.xml files once `urls`
+        exceeds the protocol's 50,000-URL limit. Returns the sitemap-N paths written."""
+        template = self.env.get_template("sitemap.xml.j2")
+        if len(urls) <= SITEMAP_MAX_URLS:
+            self.writer.write_chunks(self.output / "sitemap.xml", template.generate(urls=urls))
+            return set()
+        parts = set()
+        for n, i in enumerate(range(0, len(urls), SITEMAP_MAX_URLS), 1):
+            path = self.output / f"sitemap-{n}.xml"
+            self.writer.write_chunks(path, template.generate(urls=urls[i:i + SITEMAP_MAX_URLS]))
+            parts.add(path)
+        locs = [self.site_url() + p.name for p in sorted(parts, key=lambda p: int(p.stem.split("-")[1]))]
+        self.writer.write_chunks(self.output / "sitemap.xml", template.generate(sitemaps=locs))
+        return parts
+
+    def search_index(self, posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Inverted index for templates/search.js: `docs` holds [slug, title, date]
+        newest first, `terms` maps each word to the ascending doc numbers that
+        contain it, delta-encoded to keep the JSON small."""
+        postings: Dict[str, List[int]] = {}
+        for i, p in enumerate(posts):
+            terms = p.get("terms")
+            if terms is None:  # metadata from a manifest written before the search index existed
+                terms = search_terms(p.get("title"), p.get("summary"), p.get("category"), *(p.get("tags") or []))
+            for t in terms:
+                postings.setdefault(t, []).append(i)
+        return {
+            "version": 1,
+            "stopwords": sorted(STOPWORDS),
+            "docs": [[p["slug"], p.get("title") or p["slug"], str(p["date"])] for p in posts],
+            "terms": {t: [ids[0]] + [b - a for a, b in zip(ids, ids[1:])] for t, ids in sorted(postings.items())},
+        }
+
+    def paginate(self, template, posts: List[Dict[str, Any]], folder: pathlib.Path, stem: str,
+                 base: str, heading: str | None, atom: bool = True) -> List[pathlib.Path]:
+        """Write `stem.html`, `stem-2.html`, ... with `index_page_size` posts each; returns them in page order."""
+        size = max(1, int(self.settings.get("index_page_size", 20)))
+        pages = max(1, -(-len(posts) // size))
+        name = lambda n: f"{stem}.html" if n == 1 else f"{stem}-{n}.html"
+        written = []
+        for n in range(1, pages + 1):
+            html = template.render(posts=posts[(n - 1) * size:n * size], page=n, pages=pages, base=base,
+                                   assets=self.assets or self.publish_static(),
+                                   heading=heading, atom=atom, prev_url=name(n - 1) if n > 1 else None,
+                                   next_url=name(n + 1) if n < pages else None)
+            path = folder / name(n)
+            self.writer.write_text(path, html)
+            written.append(path)
+        return written
+
+    def json_feed(self, posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """JSON Feed 1.1 of the newest `feed_items` posts."""
+        base = self.site_url()
+        items = [{
+            "id": base + post_path(p["slug"]),
+            "url": base + post_path(p["slug"]),
+            "title": p.get("title"),
+            "summary": p.get("summary"),
+            "date_published": iso_date(p["date"]),
+            "tags": [t for t in [p.get("category"), *(p.get("tags") or [])] if t],
+        } for p in posts[:max(0, int(self.settings.get("feed_items", 50)))]]
+        return {
+            "version": "https://jsonfeed.org/version/1.1",
+            "title": self.settings.get("site_name", "RippleWriter"),
+            "home_page_url": base,
+            "feed_url": f"{base}feed.json",
+            "items": items,
+        }
+
+    def publish_assets(self, posts: List[Dict[str, Any]]) -> None:
+        """Hard-link every image a post references from the asset store into output/images/."""
+        names = {n for p in posts for n in p.get("images") or []}
+        published = self.store.publish(names, self.output / "images", self.writer, extra=self.images.files(names))
+        if names - published:
+            self.log(f"Missing images: {', '.join(sorted(names - published))}")
+
+    def precompress(self) -> None:
+        """Write .gz (and .br when the brotli package is installed) next to every
+        text file in output/ whose siblings are missing or older than it."""
+        try:
+            import brotli  # optional
+        except ImportError:
+            brotli = None
+        t0 = time.perf_counter()
+        min_bytes = int(self.settings.get("precompress_min_bytes", 256))
+        todo: List[pathlib.Path] = []
+        for p in self.output.rglob("*"):
+            if p.suffix in (".gz", ".br"):
+                if not p.with_suffix("").exists():
+                    p.unlink()  # source was removed
+                continue
+            if p.name.startswith(".") or p.suffix.lower() not in TEXT_EXTS or not p.is_file():
+                continue
+            st = p.stat()
+            if st.st_size < min_bytes:
+                continue
+            sibs = [p.with_name(p.name + ".gz")] + ([p.with_name(p.name + ".br")] if brotli else [])
+            if any(not s.exists() or s.stat().st_mtime_ns < st.st_mtime_ns for s in sibs):
+                todo.append(p)
+        if not todo:
+            return
+
+        def one(p: pathlib.Path) -> Tuple[int, int, int]:
+            data = p.read_bytes()
+            out = [(p.with_name(p.name + ".gz"), gzip.compress(data, 9, mtime=0))]
+            if brotli:
+                out.append((p.with_name(p.name + ".br"), brotli.compress(data, quality=11)))
+            for sib, blob in out:
+                if not self.writer.write_bytes(sib, blob):
+                    os.utime(sib)  # same bytes; mark as fresh so it is not redone next build
+            return len(data), len(out[0][1]), len(out[1][1]) if brotli else 0
+
+        workers = min(len(todo), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:  # zlib/brotli release the GIL
+            sizes = list(pool.map(one, todo))
+        raw, gz, br = (sum(col) for col in zip(*sizes))
+        msg = f"Precompressed {len(todo)} file(s): {raw / 1024:.1f} KiB → gzip {gz / 1024:.1f} KiB ({gz / raw:.0%})"
+        if brotli:
+            msg += f", brotli {br / 1024:.1f} KiB ({br / raw:.0%})"
+        self.log(f"{msg} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    # --------------------------
+    # Build manifest (incremental builds)
+    # --------------------------
+    def load_manifest(self) -> Dict[str, Any]:
+        try:
+            m = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            m = {}
+        if m.get("version") != MANIFEST_VERSION:
+            m = {"version": MANIFEST_VERSION, "inputs": "", "articles": {}}
+        return m
+
+    def save_manifest(self, m: Dict[str, Any]) -> None:
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(m, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+        (self.output / LEGACY_MANIFEST).unlink(missing_ok=True)
+
+    def inputs_fingerprint(self) -> str:
+        """Hash of everything shared by all posts: templates, settings and this script."""
+        h = hashlib.sha256()
+        for p in sorted(self.templates.glob("*")) + [self.config, pathlib.Path(__file__)]:
+            if p.is_file():
+                h.update(p.name.encode("utf-8") + b"\0" + p.read_bytes() + b"\0")
+        return h.hexdigest()
+
+    def article_key(self, p: pathlib.Path) -> str:
+        p = p.resolve()
         try:
-            art = Article(**raw)
-        except ValidationError as ve:
-            print(f"Validation error in {yf}: {ve}")
+            return p.relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return p.as_posix()
+
+    def outputs_exist(self, meta: Dict[str, Any] | None) -> bool:
+        if meta is None:
+            return True
+        return all((self.posts_dir / f"{meta['slug']}{ext}").exists() for ext in (".md", ".html"))
+
+    # --------------------------
+    # Build
+    # --------------------------
+    def build(self, paths: List[str] | None = None, force: bool = False, regenerate: bool = False) -> BuildResult:
+        """Render `paths` (globs; default: every draft) and refresh the index.
+        Never raises: failures are reported through BuildResult.ok/error/logs."""
+        return self._run(self._build, paths, force, regenerate)
+
+    def run_batch(self, queue: pathlib.Path, journal: pathlib.Path | None = None,
+                  retries: int = 3, backoff: float = 2.0) -> BuildResult:
+        """Generate and render every draft listed in `queue`, resumably (see BatchJournal)."""
+        return self._run(self._run_batch, pathlib.Path(queue), journal, retries, backoff)
+
+    def _run(self, fn, *args) -> BuildResult:
+        with self._lock:
+            self._logs = []
+            result = BuildResult(logs=self._logs)
+            t0 = time.perf_counter()
+            self.writer.reset()
+            try:
+                self.refresh_settings()  # a long-lived builder (Studio, serve) must see settings edits
+                fn(result, *args)
+                if self.compress_output and result.ok:
+                    self.precompress()
+            except Exception as e:
+                result.ok = False
+                result.error = f"{type(e).__name__}: {e}"
+                self.log(traceback.format_exc().rstrip())
+            result.written, result.skipped = list(self.writer.written), list(self.writer.skipped)
+            if result.written or result.skipped:
+                out = self.writer.summary()
+                self.log(f"Output: {out['written']} file(s) written ({out['bytes_written'] / 1024:.1f} KiB), "
+                         f"{out['skipped']} unchanged")
+            result.elapsed = time.perf_counter() - t0
+            return result
+
+    def _build(self, result: BuildResult, paths: List[str] | None, force: bool, regenerate: bool) -> None:
+        t_start = time.perf_counter()
+        self.posts_dir.mkdir(parents=True, exist_ok=True)
+
+        yaml_files: List[str] = []
+        if paths:
+            for p in paths:
+                yaml_files += glob.glob(p)
+        else:
+            yaml_files = glob.glob(str(self.articles_dir / "*.yml")) + glob.glob(str(self.articles_dir / "*.yaml"))
+
+        manifest = self.load_manifest()
+        entries: Dict[str, Any] = manifest["articles"]
+        shared = self.inputs_fingerprint()
+        force = force or regenerate
+        inputs_changed = force or manifest["inputs"] != shared
+
+        # A full build forgets drafts that no longer exist
+        pruned = False
+        if not paths:
+            live = {self.article_key(pathlib.Path(yf)) for yf in yaml_files}
+            for key in [k for k in entries if k not in live]:
+                del entries[key]
+                pruned = True
+
+        articles: List[Dict[str, Any]] = []
+        pending: List[Tuple[str, str]] = []
+        for yf in sorted(yaml_files):
+            path = pathlib.Path(yf)
+            key = self.article_key(path)
+            src = path.read_bytes()
+            fp = hashlib.sha256(shared.encode("ascii") + src).hexdigest()
+            entry = entries.get(key)
+            if not force and entry and entry["fingerprint"] == fp and self.outputs_exist(entry["meta"]):
+                result.unchanged += 1
+                continue
+
+            raw = yaml.safe_load(src)
+            try:
+                art = Article(**raw)
+            except ValidationError as ve:
+                self.log(f"Validation error in {yf}: {ve}")
+                entries[key] = {"fingerprint": fp, "meta": None}
+                continue
+            articles.append(art.model_dump())
+            pending.append((key, fp))
+
+        if not articles and not inputs_changed and not pruned and (self.output / "index.html").exists():
+            self.log(f"Up to date: {result.unchanged} draft(s) unchanged ({(time.perf_counter() - t_start) * 1000:.1f} ms)")
+            return
+
+        if self.settings.get("jinja_precompile", True):
+            self.precompile()
+        self.publish_static()
+
+        if articles:
+            self.prepare_images(articles)
+            # Reuse fresh `generated_sections` from the YAML; only the rest go to the LLM
+            reused = [None if regenerate else stored_sections(y) for y in articles]
+            todo = [y for y, sec in zip(articles, reused) if sec is None]
+
+            generated: List[Tuple[Dict[str, str], float]] = []
+            if todo:
+                llm = self.llm
+                llm.refresh_cache = regenerate
+                workers = min(concurrency_limit(self.settings), len(todo))
+                # Cache/limiter counters are per process; log only this build's share
+                cache_before = llm.cache.stats() if llm.cache is not None else None
+                rl_before = llm.limiter.stats()
+                llm.limiter.reset_peaks()
+                t0 = time.perf_counter()
+                try:
+                    generated = generate_sections(llm, todo, workers)
+                finally:
+                    llm.refresh_cache = False
+                elapsed = time.perf_counter() - t0
+                self.log(f"Generated sections for {len(todo)} article(s) in {elapsed:.2f}s ({workers} worker(s))")
+                if cache_before is not None:
+                    stats = stats_delta(cache_before, llm.cache.stats())
+                    self.log(f"LLM cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
+                if llm.limiter.enabled:
+                    rl = stats_delta(rl_before, llm.limiter.stats(), ("requests", "queued", "total_wait"))
+                    self.log(f"Rate limiter: {rl['queued']}/{rl['requests']} call(s) queued, "
+                             f"max depth {rl['max_queue_depth']}, waited {rl['total_wait']:.1f}s "
+                             f"(max {rl['max_wait']:.1f}s)")
+
+            fresh = iter(generated)
+            for y, (key, fp), sec in zip(articles, pending, reused):
+                if sec is None:
+                    sec, dt = next(fresh)
+                    note = f"sections in {dt:.2f}s"
+                else:
+                    note = "reused stored sections"
+                meta = self.render_post(y, sec)
+                entries[key] = {"fingerprint": fp, "meta": meta}
+                result.rendered.append(meta)
+                self.log(f"  {meta['slug']}: {note}")
+
+        # The index lists every known post, including ones skipped this run
+        posts_meta = [e["meta"] for e in entries.values() if e["meta"] is not None]
+        self.render_index(posts_meta)
+        self.publish_assets(posts_meta)
+        if not paths:
+            self.prune_static()  # single-draft builds leave other posts on older fingerprints
+        manifest["inputs"] = shared
+        self.save_manifest(manifest)
+        self.log(f"Rendered {len(result.rendered)} post(s), {result.unchanged} draft(s) unchanged, "
+                 f"{len(posts_meta)} in index → {self.output}")
+
+    # --------------------------
+    # Batch queue
+    # --------------------------
+    def _run_batch(self, result: BuildResult, queue: pathlib.Path, journal_path: pathlib.Path | None,
+                   retries: int, backoff: float) -> None:
+        t_start = time.perf_counter()
+        self.posts_dir.mkdir(parents=True, exist_ok=True)
+        jobs = read_queue(queue)
+        journal = BatchJournal(pathlib.Path(journal_path) if journal_path else queue.with_suffix(".journal.jsonl"))
+
+        finished = {job for job, rec in journal.states().items() if rec["state"] == "done"}
+        todo = [job for job in jobs if job not in finished]
+        self.log(f"Batch: {len(jobs)} job(s), {len(jobs) - len(todo)} already done, {len(todo)} to run "
+                 f"(journal: {journal.path})")
+        for job in todo:
+            journal.record(job, "pending")
+
+        manifest = self.load_manifest()
+        entries: Dict[str, Any] = manifest["articles"]
+        shared = self.inputs_fingerprint()
+        lock = threading.Lock()
+
+        def run(job: str) -> Tuple[str, Dict[str, Any] | None, float, str | None]:
+            journal.record(job, "running")
+            t0 = time.perf_counter()
+            try:
+                key, fp, meta = self._batch_job(job, shared, journal, retries, backoff)
+            except Exception as e:
+                dt = time.perf_counter() - t0
+                err = f"{type(e).__name__}: {e}"
+                journal.record(job, "failed", seconds=round(dt, 3), error=err)
+                return job, None, dt, err
+            dt = time.perf_counter() - t0
+            with lock:
+                entries[key] = {"fingerprint": fp, "meta": meta}
+                self.save_manifest(manifest)  # before "done": a resumed batch skips this job
+            journal.record(job, "done", seconds=round(dt, 3), slug=meta["slug"])
+            return job, meta, dt, None
+
+        if self.settings.get("jinja_precompile", True):
+            self.precompile()
+        self.publish_static()
+        # Derivatives for every queued draft in one process-pool pass, before the threads need them
+        self.prepare_images([y for y in map(peek_yaml, todo) if isinstance(y, dict)])
+
+        outcomes = []
+        if todo:
+            _ = self.llm  # create the shared client before fanning out
+            workers = min(concurrency_limit(self.settings), len(todo))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(run, todo))
+
+        timings = []
+        for job, meta, dt, err in outcomes:
+            if meta is None:
+                result.failed.append(job)
+                self.log(f"  FAILED {job} after {dt:.2f}s: {err}")
+            else:
+                result.rendered.append(meta)
+                timings.append(dt)
+                self.log(f"  done   {job} → {meta['slug']} in {dt:.2f}s")
+
+        posts_meta = [e["meta"] for e in entries.values() if e["meta"] is not None]
+        self.render_index(posts_meta)
+        self.publish_assets(posts_meta)
+        manifest["inputs"] = shared
+        self.save_manifest(manifest)
+
+        elapsed = time.perf_counter() - t_start
+        rate = len(timings) / elapsed * 60 if elapsed > 0 else 0.0
+        self.log(f"Batch finished: {len(timings)} done, {len(result.failed)} failed in {elapsed:.2f}s "
+                 f"({rate:.1f} job(s)/min)")
+        if timings:
+            self.log(f"Job time: min {min(timings):.2f}s, mean {sum(timings) / len(timings):.2f}s, "
+                     f"max {max(timings):.2f}s")
+        result.ok = not result.failed
+
+    def _batch_job(self, job: str, shared: str, journal: BatchJournal,
+                   retries: int, backoff: float) -> Tuple[str, str, Dict[str, Any]]:
+        path = pathlib.Path(job)
+        src = path.read_bytes()
+        fp = hashlib.sha256(shared.encode("ascii") + src).hexdigest()
+        y = Article(**(yaml.safe_load(src) or {})).model_dump()
+
+        sections = stored_sections(y)
+        attempt = 0
+        while sections is None:
+            attempt += 1
+            try:
+                sections = self.llm.write_post_sections(y)
+            except Exception as e:
+                if attempt > retries or not is_transient(e):
+                    raise
+                delay = backoff * 2 ** (attempt - 1)
+                journal.record(job, "running", attempt=attempt, retry_in=delay, error=f"{type(e).__name__}: {e}")
+                time.sleep(delay)
+
+        meta = self.render_post(y, sections)
+        return self.article_key(path), fp, meta
+
+def peek_yaml(path: str) -> Any:
+    """Parse a draft without validating it (None if unreadable); the job itself reports errors."""
+    try:
+        return yaml.safe_load(pathlib.Path(path).read_text(encoding="utf-8"))
+    except (OSError, yaml.YAMLError):
+        return None
+
+def post_path(slug: str) -> str:
+    """Site-relative URL of a post, with the slug percent-encoded."""
+    return f"posts/{quote(slug)}.html"
+
+def read_queue(path: pathlib.Path) -> List[str]:
+    """Queue file: one draft path or glob per line; blank lines and # comments are ignored."""
+    jobs: List[str] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
             continue
-        y = art.model_dump()
-        sections = llm.write_post_sections(y)
-        meta = render_post(y, sections)
-        posts_meta.append(meta)
+        for job in sorted(glob.glob(line)) or [line]:
+            if job not in jobs:
+                jobs.append(job)
+    return jobs
+
+class BatchJournal:
+    """Append-only JSONL record of batch job states (pending/running/done/failed).
+
+    The last record per job wins, so after a crash a rerun skips jobs already
+    marked done and retries everything else. Each line is fsynced.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        last: Dict[str, Dict[str, Any]] = {}
+        if not self.path.exists():
+            return last
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn write from a crash
+            last[rec["job"]] = rec
+        return last
+
+    def record(self, job: str, state: str, **extra: Any) -> None:
+        rec = {"job": job, "state": state, "ts": datetime.datetime.now().isoformat(timespec="seconds"), **extra}
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+# --------------------------
+# Live-reload dev server
+# --------------------------
+LIVERELOAD_PATH = "/__livereload"
+LIVERELOAD_SNIPPET = (f"<script>new EventSource('{LIVERELOAD_PATH}')"
+                      ".onmessage = () => location.reload();</script>").encode("utf-8")
+
+class DevServer:
+    """`render.py serve`: watch drafts/templates/config, rebuild, serve output/.
+
+    A draft change rebuilds that post plus the index; a template or settings
+    change (or a deleted draft) runs a full build, which the manifest turns
+    into a rebuild of everything because the shared inputs hash moved. HTML
+    responses get a small EventSource script that reloads the page after each
+    rebuild.
+    """
+
+    def __init__(self, builder: SiteBuilder, host: str = "127.0.0.1", port: int = 8000, debounce: float = 0.15):
+        self.builder = builder
+        self.host = host
+        self.port = port
+        self.debounce = debounce
+        self.version = 0
+        self.last: BuildResult | None = None
+        self._changed: Dict[str, float] = {}
+        self._wake = threading.Event()
+        self._cond = threading.Condition()
+
+    # --------------------------
+    # Rebuilds
+    # --------------------------
+    def notify(self, path: str) -> None:
+        p = pathlib.Path(path)
+        b = self.builder
+        if p.name.startswith(".") or p.name.endswith(("~", ".tmp", ".swp")):
+            return  # editor swap/backup files and our own atomic-write temps
+        if p.parent == b.articles_dir and p.suffix.lower() not in (".yaml", ".yml"):
+            return
+        if p.parent == b.config.parent and p.suffix.lower() not in (".yaml", ".yml"):
+            return
+        with self._cond:
+            self._changed.setdefault(str(p), time.perf_counter())
+        self._wake.set()
+
+    def rebuild(self, changed: Dict[str, float]) -> None:
+        b = self.builder
+        drafts = [p for p in changed if pathlib.Path(p).parent == b.articles_dir]
+        full = len(drafts) < len(changed) or any(not pathlib.Path(p).exists() for p in drafts)
+
+        self.last = b.build(None if full else drafts)
+        done = time.perf_counter()
+        what = "full site" if full else ", ".join(pathlib.Path(p).name for p in drafts)
+        status = "ok" if self.last.ok else f"FAILED ({self.last.error or 'see log'})"
+        print(f"[serve] {what}: {status}, {len(self.last.rendered)} post(s) rendered in "
+              f"{self.last.elapsed * 1000:.0f} ms (save → ready {(done - min(changed.values())) * 1000:.0f} ms)")
+        for line in self.last.logs:
+            if "error" in line.lower() or not self.last.ok:
+                print(f"        {line}")
+        with self._cond:
+            self.version += 1
+            self._cond.notify_all()
+
+    def _rebuild_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(self.debounce)  # let editors finish multi-event saves
+            with self._cond:
+                self._wake.clear()
+                changed, self._changed = self._changed, {}
+            if changed:
+                self.rebuild(changed)
+
+    def wait_for_change(self, seen: int, timeout: float = 15.0) -> int:
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != seen, timeout=timeout)
+            return self.version
+
+    # --------------------------
+    # HTTP
+    # --------------------------
+    def handler(self):
+        from http.server import SimpleHTTPRequestHandler  # lazy import
+        server = self
+
+        class Handler(SimpleHTTPRequestHandler):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=str(server.builder.output), **kwargs)
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == LIVERELOAD_PATH:
+                    return self.send_events()
+                path = self.translate_path(self.path)
+                if os.path.isdir(path):
+                    path = os.path.join(path, "index.html")
+                if not path.endswith(".html") or not os.path.isfile(path):
+                    return super().do_GET()
+                body = pathlib.Path(path).read_bytes()
+                i = body.rfind(b"</body>")
+                body = body[:i] + LIVERELOAD_SNIPPET + body[i:] if i >= 0 else body + LIVERELOAD_SNIPPET
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_events(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                seen = server.version
+                try:
+                    while True:
+                        v = server.wait_for_change(seen)
+                        self.wfile.write(b"data: reload\n\n" if v != seen else b": ping\n\n")
+                        self.wfile.flush()
+                        seen = v
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
+
+    def serve_forever(self) -> BuildResult:
+        from http.server import ThreadingHTTPServer  # lazy import
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        b = self.builder
+        self.last = b.build()
+        print(f"[serve] initial build: {len(self.last.rendered)} post(s) in {self.last.elapsed * 1000:.0f} ms")
+
+        server = self
+
+        class Events(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory or event.event_type in ("opened", "closed", "closed_no_write"):
+                    return
+                server.notify(event.src_path)
+                if getattr(event, "dest_path", ""):
+                    server.notify(event.dest_path)
+
+        observer = Observer()
+        for d in (b.articles_dir, b.templates, b.config.parent):
+            observer.schedule(Events(), str(d), recursive=False)
+        observer.daemon = True
+        observer.start()
+        threading.Thread(target=self._rebuild_loop, daemon=True).start()
+
+        httpd = ThreadingHTTPServer((self.host, self.port), self.handler())
+        httpd.daemon_threads = True
+        print(f"[serve] http://{self.host}:{httpd.server_address[1]}/ (watching articles/, templates/, config/; Ctrl-C to stop)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+            observer.stop()
+        return self.last
+
+def main(paths: List[str] | None = None, force: bool = False, regenerate: bool = False,
+         precompress: bool = False) -> BuildResult:
+    builder = SiteBuilder(echo=True)
+    builder.force_precompress = precompress
+    return builder.build(paths, force=force, regenerate=regenerate)
+
+def cli(argv: List[str]) -> BuildResult:
+    if argv[:1] == ["batch"]:
+        ap = argparse.ArgumentParser(prog="render.py batch",
+                                     description="Generate and render a queue of drafts; resumable after a crash.")
+        ap.add_argument("queue", help="text file with one draft YAML path or glob per line")
+        ap.add_argument("--journal", help="JSONL job journal (default: <queue>.journal.jsonl)")
+        ap.add_argument("--retries", type=int, default=3, help="retries per job on transient LLM errors")
+        ap.add_argument("--backoff", type=float, default=2.0, help="first retry delay in seconds; doubles per attempt")
+        args = ap.parse_args(argv[1:])
+        return SiteBuilder(echo=True).run_batch(pathlib.Path(args.queue), args.journal,
+                                                retries=args.retries, backoff=args.backoff)
+
+    if argv[:1] == ["serve"]:
+        ap = argparse.ArgumentParser(prog="render.py serve",
+                                     description="Serve output/ with live reload, rebuilding drafts as they change.")
+        ap.add_argument("--host", default="127.0.0.1")
+        ap.add_argument("--port", type=int, default=8000)
+        args = ap.parse_args(argv[1:])
+        return DevServer(SiteBuilder(), host=args.host, port=args.port).serve_forever()
 
-    render_index(posts_meta)
-    print(f"Rendered {len(posts_meta)} post(s) to {OUTPUT}")
+    ap = argparse.ArgumentParser(description="Render article YAMLs into output/. "
+                                             "Subcommands: batch, serve (see `render.py <cmd> -h`).")
+    ap.add_argument("paths", nargs="*", help="YAML files or globs (default: all drafts in articles/)")
+    ap.add_argument("--force", action="store_true", help="ignore the build manifest and rebuild every post")
+    ap.add_argument("--regenerate", action="store_true",
+                    help="ask the LLM for fresh sections even if the YAML or cache already has them")
+    ap.add_argument("--precompress", action="store_true",
+                    help="also write .gz/.br siblings for changed text files (default: `precompress` setting)")
+    args = ap.parse_args(argv)
+    return main(args.paths or None, force=args.force, regenerate=args.regenerate, precompress=args.precompress)
 
 if __name__ == "__main__":
-    args = sys.argv[1:]
-    main(args if args else None)
+    result = cli(sys.argv[1:])
+    sys.exit(0 if result.ok else 1)
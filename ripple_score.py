@@ -0,0 +1,387 @@
+"""Ripple score signals and equations, shared by the Studio and batch/CI tooling.
+
+analyze() reads a text once into a TextStats record; every signal is derived
+from that record. extract_signals() scores one article's sections,
+compute_intention_scores() its claims, and score_corpus() scores many
+articles against many equations at once (signal matrix × weight matrix).
+"""
+from __future__ import annotations
+import re
+import sys
+import json
+import hashlib
+import threading
+import glob
+import pathlib
+import argparse
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Sequence
+
+import numpy as np
+import yaml
+
+ROOT = pathlib.Path(__file__).parent
+EQUATIONS_PATH = ROOT / "config" / "equations.yaml"
+
+SIGNALS = ("coherence", "evidence", "novelty", "clarity", "sentiment")
+SENTIMENT_BASELINE = 0.7  # neutral-ish = good; placeholder until a real sentiment signal exists
+
+_TOKEN_PUNCT = ".,:;!?'\"()[]"
+_BULLET_PREFIXES = ("-", "*", "•", "1.", "2.", "3.")
+POSITIVE_WORDS = ("excellent", "good", "clear", "strong", "improve", "win")
+NEGATIVE_WORDS = ("bad", "poor", "unclear", "weak", "worse", "lose")
+
+_CITATION_RE = re.compile(r"http://|https://|\[|\]\(|doi:|arxiv\.org|source|citation|references")
+_TERM_RE = re.compile(r"[a-z]{4,}")
+# Every sparse marker analyze() counts, as one alternation of literals (so the regex engine
+# can skip non-candidate characters in C): link and citation hints, ellipses and digits.
+# Longer markers come first so "https://" is read as one link + one citation hint.
+_MARKER_RE = re.compile(r"https?://|http|doi:?|source:?|" + _CITATION_RE.pattern
+                        + r"|\.\.\.|\?\?|" + "|".join("0123456789"))
+# marker -> (link hits, citation hits)
+_LINK_MARKERS = {"http://": (1, 1), "https://": (1, 1), "http": (1, 0), "doi:": (1, 1), "doi": (1, 0),
+                 "source:": (1, 1), "source": (0, 1), "[": (0, 1), "](": (0, 1), "arxiv.org": (0, 1),
+                 "citation": (0, 1), "references": (0, 1)}
+
+# --------------------------------------
+# Single-pass text analysis
+# --------------------------------------
+@dataclass(frozen=True)
+class TextStats:
+    """Everything the signal heuristics need from one text, computed once."""
+    words: int                          # whitespace-separated tokens
+    unique_tokens: int                  # distinct lowercased tokens, edge punctuation stripped
+    unique_terms: int                   # distinct words of 4+ letters
+    sentence_lengths: tuple[int, ...]   # words per sentence (split on . ? !)
+    digits: int                         # ASCII digits
+    links: int                          # "http" / "doi" / "source:" mentions
+    citation_hints: int                 # _CITATION_RE matches
+    ellipses: int                       # "..." and "??"
+    bullets: int                        # lines starting with -, *, •, 1., 2., 3.
+    positive_hits: int                  # distinct positive lexicon words present
+    negative_hits: int                  # distinct negative lexicon words present
+
+_STATS: "OrderedDict[bytes, TextStats]" = OrderedDict()
+_STATS_SIZE = 64
+_STATS_LOCK = threading.Lock()
+
+def _scan(text: str) -> TextStats:
+    t = text.lower()
+    links = cites = ellipses = digits = 0
+    for marker, n in Counter(_MARKER_RE.findall(t)).items():
+        if marker in _LINK_MARKERS:
+            link, cite = _LINK_MARKERS[marker]
+            links += link * n
+            cites += cite * n
+        elif marker in ("...", "??"):
+            ellipses += n
+        else:
+            digits += n
+    tokens = t.split()
+    # Token-level stats only need each distinct token once (nothing here spans whitespace)
+    vocab = set(tokens)
+    vocab_text = " ".join(vocab)
+    lengths = [len(s.split()) for s in t.replace("?", ".").replace("!", ".").split(".")]
+    return TextStats(
+        words=len(tokens),
+        unique_tokens=len({w.strip(_TOKEN_PUNCT) for w in vocab}),
+        unique_terms=len(set(_TERM_RE.findall(vocab_text))),
+        sentence_lengths=tuple(n for n in lengths if n),
+        digits=digits,
+        links=links,
+        citation_hints=cites,
+        ellipses=ellipses,
+        bullets=sum(1 for line in t.splitlines() if line.lstrip().startswith(_BULLET_PREFIXES)),
+        positive_hits=sum(w in vocab_text for w in POSITIVE_WORDS),
+        negative_hits=sum(w in vocab_text for w in NEGATIVE_WORDS),
+    )
+
+def analyze(text: str) -> TextStats:
+    """Lowercase `text` once and collect every statistic used for scoring: one
+    marker scan (links, citation hints, ellipses, digits), one tokenization,
+    and token/term/lexicon stats over the distinct tokens only.
+
+    Small LRU memo keyed by a digest of the text (not the text itself), so
+    scoring the same text from several paths costs one analysis without the
+    cache pinning whole drafts in memory."""
+    key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    with _STATS_LOCK:
+        st = _STATS.get(key)
+        if st is not None:
+            _STATS.move_to_end(key)
+            return st
+    st = _scan(text)
+    with _STATS_LOCK:
+        _STATS[key] = st
+        if len(_STATS) > _STATS_SIZE:
+            _STATS.popitem(last=False)
+    return st
+
+def clear_stats_cache() -> None:
+    with _STATS_LOCK:
+        _STATS.clear()
+
+# --------------------------------------
+# Per-article helpers
+# --------------------------------------
+def extract_sections(article: Dict[str, Any]) -> Dict[str, str]:
+    """Return a dict of key text buckets to analyze."""
+    txt = []
+    # Use generated sections if present; fallback to outline + thesis
+    gen = article.get("generated_sections", {})
+    for k in ("lede", "body", "counterpoints", "conclusion"):
+        v = gen.get(k, "")
+        if isinstance(v, list):  # some LLMs may return arrays
+            v = "\n".join(v)
+        txt.append(v or "")
+    thesis = article.get("thesis", "")
+    outline = "\n".join(article.get("outline", []))
+    return {
+        "thesis": thesis or "",
+        "outline": outline or "",
+        "content": "\n\n".join(txt).strip(),
+    }
+
+def _count_bullets(s: str) -> int:
+    # quick proxy for structure/clarity: leading hyphens/numbers
+    return analyze(s).bullets
+
+def _count_citations(s: str) -> int:
+    # quick proxy for evidence: markdown/linky bits
+    return analyze(s).citation_hints
+
+def _count_unique_terms(s: str) -> int:
+    return analyze(s).unique_terms
+
+# Raw counts behind each signal, and the count at which the signal saturates at 1.0
+_COUNT_SCALES = {"coherence": 800.0, "evidence": 6.0, "novelty": 800.0, "clarity": 8.0}
+
+def article_counts(article: Dict[str, Any]) -> List[int]:
+    """[words, citation hints, outline bullets, unique terms] for one article."""
+    sec = extract_sections(article)
+    content = analyze(sec["content"])
+    return [content.words, content.citation_hints, analyze(sec["outline"]).bullets, content.unique_terms]
+
+def extract_signals(article: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Very light heuristics to get us started.
+    Replace with your proper analyzers later (LLM checks, classifiers, etc.).
+    """
+    words, cites, bullets, terms = article_counts(article)
+    return {
+        "coherence": min(1.0, words / _COUNT_SCALES["coherence"]),  # longer → more developed (proxy)
+        "evidence": min(1.0, cites / _COUNT_SCALES["evidence"]),
+        "novelty": min(1.0, terms / _COUNT_SCALES["novelty"]),
+        "clarity": min(1.0, bullets / _COUNT_SCALES["clarity"]),
+        "sentiment": SENTIMENT_BASELINE,
+    }
+
+# --------------------------------------
+# Claim-level scoring (compute_intention_scores)
+# --------------------------------------
+def extract_claims_for_scoring(article: dict[str, Any]) -> list[str]:
+    claims = [c for c in article.get("claims", []) if isinstance(c, str) and c.strip()]
+    if not claims:
+        outline = article.get("outline", [])
+        claims.extend([o for o in outline if isinstance(o, str) and o.strip()])
+    if not claims:
+        gs = article.get("generated_sections", {})
+        for k in ("lede", "body", "counterpoints", "conclusion"):
+            txt = gs.get(k, "")
+            if isinstance(txt, str) and txt.strip():
+                claims.extend([s.strip() for s in txt.split(". ") if len(s.strip()) > 40][:3])
+    return claims[:8]
+
+def claim_signals(st: TextStats) -> Dict[str, float]:
+    """All five claim-level signals from one TextStats."""
+    if st.sentence_lengths:
+        avg = sum(st.sentence_lengths) / len(st.sentence_lengths)
+        clarity = 1.0 if 12 <= avg <= 22 else max(0.0, 1.0 - (abs(avg - 17) / 25.0))
+    else:
+        clarity = 0.5
+    total = st.positive_hits + st.negative_hits
+    sentiment = 0.6 if total == 0 else max(0.0, min(1.0, (st.positive_hits - st.negative_hits) / total * 0.5 + 0.5))
+    return {
+        "coherence": max(0.0, 1.0 - min(1.0, st.ellipses / 3.0)),
+        "evidence": min(1.0, (st.digits * 0.02) + (st.links * 0.25)),
+        "novelty": min(1.0, st.unique_tokens / max(8, st.words)),
+        "clarity": clarity,
+        "sentiment": sentiment,
+    }
+
+def _score_signal(text: str, kind: str) -> float:
+    if not text:
+        return 0.0
+    return claim_signals(analyze(text)).get(kind, 0.5)
+
+def compute_intention_scores(article: dict[str, Any], equation: dict[str, Any]) -> dict[str, Any]:
+    text_blob = " ".join(extract_claims_for_scoring(article))[:8000]
+    weights = equation.get("weights", {})
+    if text_blob:
+        signals = claim_signals(analyze(text_blob))
+    else:
+        signals = {k: 0.0 for k in SIGNALS}
+    overall = 0.0
+    total_w = 0.0
+    for k, w in weights.items():
+        overall += signals.get(k, 0.0) * float(w)
+        total_w += float(w)
+    ripple_score = overall / total_w if total_w > 0 else 0.0
+    return {"signals": signals, "ripple_score": ripple_score}
+
+def apply_equation(signals: Dict[str, float], weights: Dict[str, float]) -> float:
+    # weighted sum over shared keys, then clamp to [0, 1]
+    num = 0.0
+    den = 0.0
+    for k, w in weights.items():
+        v = float(signals.get(k, 0.0))
+        num += w * v
+        den += abs(w)
+    if den == 0:
+        return 0.0
+    return max(0.0, min(1.0, num / den))
+
+# --------------------------------------
+# Memoized article scoring
+# --------------------------------------
+_MEMO: "OrderedDict[str, tuple[Dict[str, float], float]]" = OrderedDict()
+_MEMO_SIZE = 256
+_MEMO_LOCK = threading.Lock()
+
+def score_key(article: Dict[str, Any], weights: Dict[str, float]) -> str:
+    """Hash of the fields extract_signals reads plus the equation weights."""
+    sec = extract_sections(article)
+    payload = json.dumps([sec["content"], sec["outline"], sorted((k, float(w)) for k, w in weights.items())],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def score_article(article: Dict[str, Any], weights: Dict[str, float]) -> tuple[Dict[str, float], float, str]:
+    """extract_signals + apply_equation, memoized by score_key.
+
+    Looks in the in-process memo first, then in the draft's own `meta` block
+    (written with `meta.score_key` by a previous run), and only then computes.
+    Returns (signals, score, key); store `key` as meta.score_key when persisting.
+    """
+    key = score_key(article, weights)
+    with _MEMO_LOCK:
+        hit = _MEMO.get(key)
+        if hit is not None:
+            _MEMO.move_to_end(key)
+            return dict(hit[0]), hit[1], key
+
+    meta = article.get("meta") if isinstance(article.get("meta"), dict) else {}
+    if meta.get("score_key") == key and isinstance(meta.get("signals"), dict) and "ripple_score" in meta:
+        signals = {k: float(v) for k, v in meta["signals"].items()}
+        score = float(meta["ripple_score"])
+    else:
+        signals = extract_signals(article)
+        score = apply_equation(signals, weights)
+
+    with _MEMO_LOCK:
+        _MEMO[key] = (dict(signals), score)
+        if len(_MEMO) > _MEMO_SIZE:
+            _MEMO.popitem(last=False)
+    return signals, score, key
+
+# --------------------------------------
+# Corpus scoring
+# --------------------------------------
+@dataclass
+class CorpusScores:
+    names: List[str]            # one per article
+    equations: List[str]        # equation ids, one per column of `scores`
+    signals: np.ndarray         # (articles, len(SIGNALS))
+    scores: np.ndarray          # (articles, equations)
+
+    def leaderboard(self, equation: str) -> List[tuple[str, float]]:
+        col = self.scores[:, self.equations.index(equation)]
+        order = np.argsort(-col, kind="stable")
+        return [(self.names[i], float(col[i])) for i in order]
+
+def signal_matrix(articles: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """Signals for every article as one (n, 5) array, columns in SIGNALS order."""
+    counts = np.array([article_counts(a) for a in articles], dtype=float).reshape(-1, 4)
+    # counts columns: words, citations, bullets, unique terms
+    scales = np.array([_COUNT_SCALES["coherence"], _COUNT_SCALES["evidence"],
+                       _COUNT_SCALES["clarity"], _COUNT_SCALES["novelty"]])
+    words, cites, bullets, terms = np.minimum(counts / scales, 1.0).T
+    sentiment = np.full(len(counts), SENTIMENT_BASELINE)
+    return np.column_stack([words, cites, terms, bullets, sentiment])
+
+def weight_matrix(equations: Sequence[Dict[str, Any]]) -> tuple[np.ndarray, np.ndarray]:
+    """(equations, 5) weights over SIGNALS, plus each equation's sum of |w| over *all* its keys
+    (unknown keys count toward the denominator, as in apply_equation)."""
+    W = np.zeros((len(equations), len(SIGNALS)))
+    den = np.zeros(len(equations))
+    for i, eq in enumerate(equations):
+        for k, w in (eq.get("weights") or {}).items():
+            if k in SIGNALS:
+                W[i, SIGNALS.index(k)] = float(w)
+            den[i] += abs(float(w))
+    return W, den
+
+def score_corpus(articles: Sequence[Dict[str, Any]], equations: Sequence[Dict[str, Any]],
+                 names: Sequence[str] | None = None) -> CorpusScores:
+    """Score every article against every equation in one matrix product.
+    Matches apply_equation(extract_signals(a), eq['weights']) element-wise."""
+    S = signal_matrix(articles)
+    W, den = weight_matrix(equations)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(den > 0, (S @ W.T) / np.where(den > 0, den, 1.0), 0.0)
+    return CorpusScores(
+        names=list(names) if names is not None else [str(a.get("title", i)) for i, a in enumerate(articles)],
+        equations=[str(eq.get("id") or eq.get("name")) for eq in equations],
+        signals=S,
+        scores=np.clip(scores, 0.0, 1.0),
+    )
+
+def load_equation_list(path: pathlib.Path = EQUATIONS_PATH) -> List[Dict[str, Any]]:
+    cfg = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    return list(cfg.get("equations", []) or [])
+
+# --------------------------------------
+# CLI: corpus leaderboard / CI quality gate
+# --------------------------------------
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Score article YAMLs against config/equations.yaml.")
+    ap.add_argument("paths", nargs="*", help="YAML files or globs (default: articles/*.yaml)")
+    ap.add_argument("--equation", default="fils", help="equation id to rank by (default: fils)")
+    ap.add_argument("--min-score", type=float, default=None,
+                    help="exit non-zero if any article scores below this (CI gate)")
+    args = ap.parse_args(argv)
+
+    files: List[str] = []
+    for p in args.paths or [str(ROOT / "articles" / "*.yaml"), str(ROOT / "articles" / "*.yml")]:
+        files += glob.glob(p)
+
+    articles, names = [], []
+    for f in sorted(files):
+        try:
+            data = yaml.safe_load(pathlib.Path(f).read_text(encoding="utf-8"))
+        except yaml.YAMLError as e:
+            print(f"[WARN] Skipping {f}: {e}", file=sys.stderr)
+            continue
+        if isinstance(data, dict):
+            articles.append(data)
+            names.append(pathlib.Path(f).name)
+
+    equations = load_equation_list()
+    res = score_corpus(articles, equations, names)
+    if args.equation not in res.equations:
+        ap.error(f"unknown equation {args.equation!r}; choose from {', '.join(res.equations)}")
+
+    board = res.leaderboard(args.equation)
+    width = max((len(n) for n, _ in board), default=10)
+    for rank, (name, score) in enumerate(board, 1):
+        print(f"{rank:>3}. {name:<{width}}  {score:.3f}")
+
+    if args.min_score is not None:
+        failing = [n for n, s in board if s < args.min_score]
+        if failing:
+            print(f"{len(failing)} article(s) below {args.min_score}: {', '.join(failing)}", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
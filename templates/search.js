@@ -0,0 +1,62 @@
+// Client-side post search over the prebuilt search-index.json (written by render.py).
+// Queries are split like render.search_terms; the last word matches as a prefix.
+(function () {
+  var script = document.currentScript;
+  var base = (script && script.getAttribute("data-base")) || "./";
+  var form = document.getElementById("search");
+  if (!form || !window.fetch) return;
+  var input = form.querySelector("input");
+  var results = form.querySelector("ul");
+  var index = null;
+  form.hidden = false;
+
+  function load() {
+    if (!index) {
+      index = fetch(base + "search-index.json").then(function (r) { return r.json(); }).then(function (idx) {
+        idx.keys = Object.keys(idx.terms);
+        idx.stop = new Set(idx.stopwords);
+        return idx;
+      });
+    }
+    return index;
+  }
+
+  function docs(gaps) {
+    var out = [], id = 0;
+    for (var i = 0; i < gaps.length; i++) { id += gaps[i]; out.push(id); }
+    return out;
+  }
+
+  function search(idx, query) {
+    var words = (query.toLowerCase().match(/[\p{L}\p{N}]+/gu) || []).filter(function (w) {
+      return w.length > 1 && !idx.stop.has(w);
+    });
+    var hits = null;
+    words.forEach(function (w, i) {
+      var ids = new Set();
+      var terms = i === words.length - 1 ? idx.keys.filter(function (k) { return k.startsWith(w); }) : [w];
+      terms.forEach(function (t) { if (idx.terms[t]) docs(idx.terms[t]).forEach(function (d) { ids.add(d); }); });
+      hits = hits === null ? Array.from(ids) : hits.filter(function (d) { return ids.has(d); });
+    });
+    return (hits || []).sort(function (a, b) { return a - b; }).slice(0, 20);
+  }
+
+  function show(idx, hits) {
+    results.textContent = "";
+    hits.forEach(function (d) {
+      var doc = idx.docs[d], li = document.createElement("li"), a = document.createElement("a");
+      a.href = base + "posts/" + doc[0].split("/").map(encodeURIComponent).join("/") + ".html";
+      a.textContent = doc[1];
+      li.appendChild(a);
+      li.appendChild(document.createTextNode(" — " + doc[2]));
+      results.appendChild(li);
+    });
+  }
+
+  input.addEventListener("focus", load);
+  input.addEventListener("input", function () {
+    var q = input.value;
+    load().then(function (idx) { if (q === input.value) show(idx, q.trim() ? search(idx, q) : []); });
+  });
+  form.addEventListener("submit", function (e) { e.preventDefault(); });
+})();
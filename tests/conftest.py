@@ -0,0 +1,52 @@
+import sys
+import pathlib
+
+# Tests import the top-level modules (llm_client, render, ...) from the repo root
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import shutil
+from typing import Any, Dict, List
+
+import pytest
+import yaml
+
+from llm_client import LLMClient
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+class RecordingClient(LLMClient):
+    """Mock-mode LLMClient that records which drafts it wrote and fails for titles in `fail`."""
+
+    def __init__(self, fail=()):
+        super().__init__(use_cache=False, use_mock=True)
+        self.calls: List[str] = []
+        self.fail = set(fail)
+
+    def write_post_sections(self, y: Dict[str, Any]) -> Dict[str, str]:
+        self.calls.append(y["title"])
+        if y["title"] in self.fail:
+            raise ValueError(f"refusing {y['title']}")
+        return super().write_post_sections(y)
+
+
+def draft(i: int, **extra: Any) -> Dict[str, Any]:
+    return {"title": f"Post {i}", "slug": f"post-{i}", "date": f"2025-01-{i + 1:02d}",
+            "thesis": f"Thesis number {i}.", "publish": {"category": "news", "tags": ["t"]}, **extra}
+
+
+@pytest.fixture
+def blog(tmp_path):
+    """Temp site root with the repo's templates/config and three drafts."""
+    shutil.copytree(ROOT / "templates", tmp_path / "templates")
+    shutil.copytree(ROOT / "config", tmp_path / "config")
+    (tmp_path / "articles").mkdir()
+    for i in range(3):
+        write_draft(tmp_path, i, draft(i))
+    return tmp_path
+
+
+def write_draft(root: pathlib.Path, i: int, data: Dict[str, Any]) -> pathlib.Path:
+    p = root / "articles" / f"post-{i}.yaml"
+    p.write_text(yaml.safe_dump(data, sort_keys=False), encoding="utf-8")
+    return p
@@ -0,0 +1,112 @@
+import pathlib
+
+import pytest
+import yaml
+
+from asset_store import AssetStore, asset_name
+from output_writer import OutputWriter
+
+PNG_A = b"\x89PNG fake image A"
+PNG_B = b"\x89PNG fake image B"
+
+
+@pytest.fixture
+def site(tmp_path):
+    """Temp tree: articles/ with its images/ store, and a legacy images/ folder."""
+    articles = tmp_path / "articles"
+    (articles / "images").mkdir(parents=True)
+    (tmp_path / "images").mkdir()
+    return tmp_path
+
+
+def store_for(site: pathlib.Path) -> AssetStore:
+    return AssetStore(site / "articles" / "images", legacy=[site / "images"])
+
+
+def write_draft(site: pathlib.Path, name: str, text: str) -> pathlib.Path:
+    p = site / "articles" / name
+    p.write_text(text, encoding="utf-8")
+    return p
+
+
+# --------------------------
+# dedupe
+# --------------------------
+def test_dedupe_collapses_duplicates_and_rewrites_both_separators(site):
+    images = site / "articles" / "images"
+    (images / "shot.png").write_bytes(PNG_A)
+    (images / "shot-copy.png").write_bytes(PNG_A)
+    (images / "other.png").write_bytes(PNG_B)
+    slash = write_draft(site, "a.yaml", "title: A\nimages:\n  - path: images/shot.png\n")
+    backslash = write_draft(site, "b.yaml", "title: B\nimages:\n  - path: images\\shot-copy.png\n"
+                                            "  - path: articles\\images\\other.png\n")
+
+    renames = store_for(site).dedupe(site / "articles")
+
+    a, b = asset_name(PNG_A, ".png"), asset_name(PNG_B, ".png")
+    assert renames == {"shot.png": a, "shot-copy.png": a, "other.png": b}
+    assert sorted(p.name for p in images.iterdir()) == sorted([a, b])
+    assert yaml.safe_load(slash.read_text())["images"] == [{"path": f"images/{a}"}]
+    assert yaml.safe_load(backslash.read_text())["images"] == [
+        {"path": f"images\\{a}"}, {"path": f"articles\\images\\{b}"}]
+
+
+def test_dedupe_dry_run_touches_nothing(site):
+    images = site / "articles" / "images"
+    (images / "shot.png").write_bytes(PNG_A)
+    draft = write_draft(site, "a.yaml", "images:\n  - path: images/shot.png\n")
+    before = draft.read_text()
+
+    renames = store_for(site).dedupe(site / "articles", dry_run=True)
+
+    assert renames == {"shot.png": asset_name(PNG_A, ".png")}
+    assert [p.name for p in images.iterdir()] == ["shot.png"]
+    assert draft.read_text() == before
+
+
+# --------------------------
+# gc
+# --------------------------
+def test_gc_keeps_referenced_and_legacy_images(site):
+    store = store_for(site)
+    used, _ = store.ingest(PNG_A, ".png")
+    unused, _ = store.ingest(PNG_B, ".png")
+    (site / "images" / "legacy.png").write_bytes(PNG_B)
+    # Second YAML document and a backslash path still count as references
+    write_draft(site, "a.yaml", f"title: A\n---\nimages:\n  - path: articles\\images\\{used}\n"
+                                "  - path: images/legacy.png\n")
+
+    assert store.gc(site / "articles", dry_run=True) == [unused]
+    assert (site / "articles" / "images" / unused).exists()
+
+    assert store.gc(site / "articles") == [unused]
+    assert sorted(p.name for p in (site / "articles" / "images").iterdir()) == [used]
+    assert (site / "images" / "legacy.png").exists()  # the legacy folder is never collected
+
+
+# --------------------------
+# publish
+# --------------------------
+def test_publish_prunes_only_stale_hashed_files(site):
+    store = store_for(site)
+    current, _ = store.ingest(PNG_A, ".png")
+    (site / "images" / "legacy.png").write_bytes(PNG_B)
+    (site / "images" / "old-legacy.png").write_bytes(PNG_B + b"!")
+    out = site / "output"
+    dest = out / "images"
+    dest.mkdir(parents=True)
+    stale = asset_name(b"superseded", ".png")
+    for name in (stale, "0123456789abcdef-480.webp", "old-legacy.png", "hand-made.png"):
+        (dest / name).write_bytes(b"x")
+    derivative = site / "cache" / "0123456789abcdef-960.webp"
+    derivative.parent.mkdir()
+    derivative.write_bytes(b"webp")
+
+    published = store.publish([current, "legacy.png", "missing.png"], dest, OutputWriter(out),
+                              extra={derivative.name: derivative})
+
+    assert published == {current, "legacy.png"}
+    assert sorted(p.name for p in dest.iterdir()) == sorted(
+        [current, "legacy.png", derivative.name, "hand-made.png"])
+    assert (dest / current).read_bytes() == PNG_A
+    assert (dest / "legacy.png").read_bytes() == PNG_B
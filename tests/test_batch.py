@@ -0,0 +1,91 @@
+import json
+import pathlib
+
+import pytest
+
+from conftest import RecordingClient
+from render import SiteBuilder
+
+
+class Crash(BaseException):
+    """Stands in for the process dying mid-batch (not caught like an ordinary job error)."""
+
+
+class CrashingClient(RecordingClient):
+    def __init__(self, crash_on: str):
+        super().__init__()
+        self.crash_on = crash_on
+
+    def write_post_sections(self, y):
+        if y["title"] == self.crash_on:
+            raise Crash()
+        return super().write_post_sections(y)
+
+
+class FlakyClient(RecordingClient):
+    """Times out on the first call for each draft, then succeeds."""
+
+    def write_post_sections(self, y):
+        if y["title"] not in self.calls:
+            self.calls.append(y["title"])
+            raise TimeoutError("try again")
+        return super().write_post_sections(y)
+
+
+@pytest.fixture
+def queue(blog, monkeypatch):
+    monkeypatch.setenv("RIPPLEWRITER_CONCURRENCY", "1")  # jobs run in queue order
+    q = blog / "queue.txt"
+    q.write_text("# every draft\n" + str(blog / "articles" / "post-*.yaml") + "\n", encoding="utf-8")
+    return q
+
+
+def states(queue):
+    last = {}
+    for line in queue.with_suffix(".journal.jsonl").read_text(encoding="utf-8").splitlines():
+        rec = json.loads(line)
+        last[pathlib.Path(rec["job"]).name] = rec["state"]
+    return last
+
+
+def indexed(b):
+    return sorted(d[0] for d in json.loads((b.output / "search-index.json").read_text())["docs"])
+
+
+def test_batch_resumes_after_interruption(blog, queue):
+    with pytest.raises(Crash):
+        SiteBuilder(root=blog, llm=CrashingClient(crash_on="Post 2")).run_batch(queue)
+    assert states(queue) == {"post-0.yaml": "done", "post-1.yaml": "done", "post-2.yaml": "running"}
+
+    b = SiteBuilder(root=blog, llm=RecordingClient())
+    result = b.run_batch(queue)
+    assert result.ok
+    assert b.llm.calls == ["Post 2"]
+    assert [m["slug"] for m in result.rendered] == ["post-2"]
+    assert indexed(b) == ["post-0", "post-1", "post-2"]  # jobs finished before the crash are kept
+    assert set(states(queue).values()) == {"done"}
+
+
+def test_failed_jobs_are_requeued_not_skipped(blog, queue):
+    b = SiteBuilder(root=blog, llm=RecordingClient(fail={"Post 1"}))
+    result = b.run_batch(queue)
+    assert not result.ok
+    assert [pathlib.Path(j).name for j in result.failed] == ["post-1.yaml"]
+    assert states(queue)["post-1.yaml"] == "failed"
+    assert indexed(b) == ["post-0", "post-2"]
+
+    b = SiteBuilder(root=blog, llm=RecordingClient())
+    result = b.run_batch(queue)
+    assert result.ok and b.llm.calls == ["Post 1"]
+    assert indexed(b) == ["post-0", "post-1", "post-2"]
+
+    assert b.run_batch(queue).rendered == []
+    assert b.llm.calls == ["Post 1"]
+
+
+def test_transient_errors_are_retried(blog, queue):
+    b = SiteBuilder(root=blog, llm=FlakyClient())
+    result = b.run_batch(queue, retries=1, backoff=0)
+    assert result.ok and len(result.rendered) == 3
+    journal = queue.with_suffix(".journal.jsonl").read_text(encoding="utf-8")
+    assert journal.count('"attempt": 1') == 3
@@ -0,0 +1,87 @@
+import json
+
+import yaml
+
+from conftest import RecordingClient, draft, write_draft
+from render import SiteBuilder
+
+
+def builder(root, llm=None):
+    return SiteBuilder(root=root, llm=llm or RecordingClient())
+
+
+def slugs(result):
+    return sorted(m["slug"] for m in result.rendered)
+
+
+def test_noop_rebuild_renders_nothing(blog):
+    b = builder(blog)
+    first = b.build()
+    assert first.ok and slugs(first) == ["post-0", "post-1", "post-2"]
+
+    again = b.build()
+    assert again.ok
+    assert again.rendered == [] and again.unchanged == 3
+    assert again.written == []
+    assert b.llm.calls == ["Post 0", "Post 1", "Post 2"]
+
+
+def test_manifest_lives_outside_output(blog):
+    b = builder(blog)
+    b.build()
+    assert b.manifest_path == blog / ".cache" / "build-manifest.json"
+    assert set(json.loads(b.manifest_path.read_text())["articles"]) == {
+        f"articles/post-{i}.yaml" for i in range(3)}
+    assert [p.name for p in b.output.rglob("*manifest*")] == ["asset-manifest.json"]
+
+
+def test_draft_edit_rebuilds_only_that_post(blog):
+    b = builder(blog)
+    b.build()
+    write_draft(blog, 1, draft(1, thesis="A different thesis."))
+
+    result = b.build()
+    assert slugs(result) == ["post-1"] and result.unchanged == 2
+    assert b.llm.calls[3:] == ["Post 1"]
+    # A single-draft build of an unchanged draft is a no-op too
+    assert b.build([str(blog / "articles" / "post-0.yaml")]).rendered == []
+
+
+def test_template_edit_rebuilds_every_post(blog):
+    b = builder(blog)
+    b.build()
+    tpl = blog / "templates" / "post.html.j2"
+    tpl.write_text(tpl.read_text(encoding="utf-8") + "\n<!-- edited -->\n", encoding="utf-8")
+
+    result = b.build()
+    assert slugs(result) == ["post-0", "post-1", "post-2"]
+    assert "<!-- edited -->" in (b.posts_dir / "post-2.html").read_text(encoding="utf-8")
+    assert b.build().rendered == []
+
+
+def test_settings_edit_rebuilds_every_post_with_new_settings(blog):
+    b = builder(blog)
+    b.build()
+    assert len(json.loads((b.output / "feed.json").read_text())["items"]) == 3
+    cfg = blog / "config" / "settings.yaml"
+    settings = yaml.safe_load(cfg.read_text(encoding="utf-8"))
+    settings["feed_items"] = 1
+    cfg.write_text(yaml.safe_dump(settings), encoding="utf-8")
+
+    result = b.build()
+    assert slugs(result) == ["post-0", "post-1", "post-2"]
+    assert len(json.loads((b.output / "feed.json").read_text())["items"]) == 1
+    assert b.build().rendered == []
+
+
+def test_deleted_draft_leaves_the_index_and_wiped_output_is_rebuilt(blog):
+    b = builder(blog)
+    b.build()
+    (blog / "articles" / "post-2.yaml").unlink()
+    result = b.build()
+    assert result.rendered == [] and result.unchanged == 2
+    docs = json.loads((b.output / "search-index.json").read_text())["docs"]
+    assert sorted(d[0] for d in docs) == ["post-0", "post-1"]
+
+    (b.posts_dir / "post-0.html").unlink()
+    assert slugs(b.build()) == ["post-0"]
@@ -0,0 +1,31 @@
+import re
+
+from conftest import RecordingClient, draft, write_draft
+from render import SiteBuilder, term_slug
+
+
+def test_term_slug_falls_back_to_a_hash():
+    assert term_slug("Open Source") == "open-source"
+    assert term_slug("C++") == "c"
+    assert term_slug("!!!").startswith("t-") and term_slug("!!!") != term_slug("???")
+    assert term_slug(2025) == "2025"
+
+
+def test_colliding_and_punctuation_only_terms(blog):
+    write_draft(blog, 0, draft(0, publish={"category": "C", "tags": ["!!!"]}))
+    write_draft(blog, 1, draft(1, publish={"category": "C++", "tags": ["!!!", "???"]}))
+    b = SiteBuilder(root=blog, llm=RecordingClient())
+    assert b.build().ok
+
+    page = (b.output / "category" / "c.html").read_text(encoding="utf-8")
+    assert "Category: C++ / C" in page  # newest post's name first
+    assert "post-0.html" in page and "post-1.html" in page
+    assert not (b.output / "category" / "c--.html").exists()
+    assert not (b.output / "tag" / ".html").exists()
+    bang = (b.output / "tag" / f"{term_slug('!!!')}.html").read_text(encoding="utf-8")
+    assert "post-0.html" in bang and "post-1.html" in bang
+
+    # Every category/tag link on the home page points at a page that was written
+    home = (b.output / "index.html").read_text(encoding="utf-8")
+    links = set(re.findall(r'href="\./((?:category|tag)/[^"]+)"', home))
+    assert links and all((b.output / link).exists() for link in links)
@@ -0,0 +1,30 @@
+import os
+
+import llm_cache
+from llm_cache import ResponseCache
+
+
+def test_get_counts_a_hit_even_if_the_lru_touch_fails(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path)
+    key = ResponseCache.key("m", 0.0, "system", "user")
+    cache.put(key, "cached text")
+
+    def refuse(*args, **kwargs):
+        raise PermissionError("read-only cache")
+    monkeypatch.setattr(llm_cache.os, "utime", refuse)
+
+    assert cache.get(key) == "cached text"
+    assert cache.get(ResponseCache.key("m", 0.0, "system", "other")) is None
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_eviction_drops_least_recently_used_first(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=11_000)
+    keys = [ResponseCache.key("m", 0.0, "s", str(i)) for i in range(4)]
+    for i, key in enumerate(keys[:3]):
+        cache.put(key, "x" * 3000)
+        os.utime(cache._path(key), (1_000 + i, 1_000 + i))
+    assert cache.get(keys[0]) == "x" * 3000  # touched: now the most recent
+
+    cache.put(keys[3], "x" * 3000)  # over budget: evict down to 90%
+    assert [cache.get(k) is not None for k in keys] == [True, False, True, True]
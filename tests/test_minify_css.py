@@ -0,0 +1,16 @@
+from render import minify_css
+
+
+def test_strips_comments_whitespace_and_last_semicolon():
+    css = "﻿/* header */\nbody {\n  margin: 0 ;\n  color: #111;\n}\n\nh1 > a ,\nh2 { padding: 1px  2px; }\n"
+    assert minify_css(css) == "body{margin:0;color:#111}h1>a,h2{padding:1px 2px}"
+
+
+def test_quoted_strings_are_left_as_is():
+    css = "a::after { content: \"Note: a , b\" ; }\nq::before { content: '{ x ; y }'; }"
+    assert minify_css(css) == "a::after{content:\"Note: a , b\"}q::before{content:'{ x ; y }'}"
+
+
+def test_comment_markers_inside_strings_and_quotes_inside_comments():
+    css = "/* it's a \"comment\" */ a { background: url(\"/*not a comment*/\") ; content: \"\\\" , \" }"
+    assert minify_css(css) == "a{background:url(\"/*not a comment*/\");content:\"\\\" , \"}"
@@ -0,0 +1,101 @@
+from typing import Iterator, List
+
+import pytest
+
+from llm_client import LLMClient, SectionParser, SECTION_KEYS
+
+DRAFT = {"title": "T", "thesis": "Streaming should match the batch path."}
+
+RESPONSE = (
+    "Preamble the parser ignores.\n"
+    "Lede: First line of the lede.\n"
+    "Second line of the lede.\n"
+    "Body: Body text.\n"
+    "\n"
+    "More body after a blank line.\n"
+    "Counterpoints: Some disagree.\n"
+    "Conclusion: Wrap up."
+)
+
+
+def chunked(text: str, size: int) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def parse(chunks: List[str]):
+    """Feed chunks through a SectionParser; returns (events in order, result())."""
+    parser = SectionParser()
+    events = []
+    for c in chunks:
+        events += parser.feed(c)
+    events += parser.close()
+    return events, parser.result()
+
+
+class StubClient(LLMClient):
+    """LLMClient whose model is a generator stub replaying `text` in `size`-character chunks."""
+
+    def __init__(self, text: str, size: int):
+        super().__init__(use_cache=False, use_mock=True)
+        self.text, self.size = text, size
+        self.streamed: List[str] = []
+
+    def _complete(self, system: str, user: str) -> str:
+        return self.text
+
+    def _stream(self, system: str, user: str) -> Iterator[str]:
+        for piece in chunked(self.text, self.size):
+            self.streamed.append(piece)
+            yield piece
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, len(RESPONSE)])
+def test_chunk_size_does_not_change_result(size):
+    events, result = parse(chunked(RESPONSE, size))
+    _, whole = parse([RESPONSE])
+    assert result == whole
+    assert [name for name, _ in events] == list(SECTION_KEYS)
+    assert dict(events) == result
+    assert result["lede"] == "First line of the lede.\nSecond line of the lede."
+    assert result["body"] == "Body text.\n\nMore body after a blank line."
+
+
+def test_header_split_across_chunks():
+    parser = SectionParser()
+    assert parser.feed("Lede: hello\nBo") == []
+    assert parser.feed("dy") == []
+    assert parser.feed(": world\n") == [("lede", "hello")]
+    assert parser.close() == [("body", "world")]
+
+
+def test_crlf_line_endings():
+    _, crlf = parse(chunked(RESPONSE.replace("\n", "\r\n"), 3))
+    _, lf = parse([RESPONSE])
+    assert crlf == lf
+    assert not any("\r" in v for v in crlf.values())
+
+
+def test_repeated_header_appends_and_reemits():
+    events, result = parse(chunked("Lede: a\nBody: b\nLede: c\n", 1))
+    assert events == [("lede", "a"), ("body", "b"), ("lede", "a\nc")]
+    assert result["lede"] == "a\nc"
+
+
+def test_sections_close_before_stream_ends():
+    """The lede is yielded as soon as the Body header arrives, not at the end."""
+    client = StubClient(RESPONSE, 5)
+    it = client.stream_post_sections(DRAFT)
+    name, _ = next(it)
+    assert name == "lede"
+    assert "".join(client.streamed) != RESPONSE
+    list(it)
+    assert "".join(client.streamed) == RESPONSE
+
+
+@pytest.mark.parametrize("size", [1, 4, 1000])
+@pytest.mark.parametrize("text", [RESPONSE, RESPONSE.replace("\n", "\r\n"), "Lede: a\nBody: b\nLede: c"])
+def test_stream_matches_write_post_sections(text, size):
+    client = StubClient(text, size)
+    streamed = dict(client.stream_post_sections(DRAFT))
+    batch = client.write_post_sections(DRAFT)
+    assert {k: streamed.get(k, "") for k in SECTION_KEYS} == batch